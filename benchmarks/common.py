@@ -0,0 +1,54 @@
+"""
+Helpers shared by the benchmarks.
+
+The benchmarks import the extension the same way the webui does, so they have to be run from the folder of the webui with its Python environment, for example:
+
+    python extensions/sd-webui-model-notes/benchmarks/db_concurrency.py
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+def load_notes():
+    """
+    Imports scripts/notes.py of the extension and registers its settings.
+
+    :return: The imported module.
+    """
+    sys.path.insert(0, os.getcwd())
+    spec = importlib.util.spec_from_file_location("model_notes", Path(__file__).parent.parent / "scripts" / "notes.py")
+    notes = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(notes)
+    notes.on_ui_settings()
+    return notes
+
+def open_database(notes) -> str:
+    """
+    Creates an empty notes database in a temporary folder.
+
+    :param notes: The imported extension.
+    :return: The file path of the database.
+    """
+    db_file = os.path.join(tempfile.mkdtemp(prefix="model_notes_benchmark_"), "notes.db")
+    notes.close_connection() # The connection of this thread would still use the previous database
+    notes.note_cache.clear()
+    notes.create_connection(db_file)
+    notes.setup_db()
+    return db_file
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """
+    Runs a function several times.
+
+    :param function: The function to measure.
+    :param repeat: How often the function is run.
+    :return: The average time of a run in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
@@ -0,0 +1,91 @@
+"""
+Measures how many notes several threads read per second while another thread keeps saving notes.
+The database connection per thread in WAL mode is compared with a single connection shared behind a lock.
+"""
+import random
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Tuple
+
+from common import load_notes, open_database
+
+note_count = 5000
+reader_counts = [1, 2, 4, 8]
+duration = 2.0 # Seconds every configuration runs
+
+def run(read: Callable[[str], object], write: Callable[[int], object], readers: int, model_hashes: List[str], close: Callable[[], None]) -> Tuple[float, float]:
+    """
+    Runs the readers and one writer at the same time.
+
+    :param read: Reads the note of a model hash.
+    :param write: Saves a note, gets a counter to change the note.
+    :param readers: The number of reader threads.
+    :param model_hashes: The hashes of the saved notes.
+    :param close: Called by every thread when it is done.
+    :return: The reads and writes per second.
+    """
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def reader(index: int) -> None:
+        try:
+            while not stop.is_set():
+                read(random.choice(model_hashes))
+                reads[index] += 1
+        finally:
+            close()
+
+    def writer() -> None:
+        try:
+            while not stop.is_set():
+                write(writes[0])
+                writes[0] += 1
+        finally:
+            close()
+
+    threads = [threading.Thread(target=reader, args=(index,)) for index in range(readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / duration, writes[0] / duration
+
+def main() -> None:
+    notes = load_notes()
+    db_file = open_database(notes)
+    model_hashes = [f"{index:064x}" for index in range(note_count)]
+    notes.set_notes([(notes.ModelType.LoRA, model_hash, f"Note {index} " * 20) for index, model_hash in enumerate(model_hashes)])
+    read_sql = "SELECT note, format FROM notes WHERE model_hash = ?"
+
+    shared_conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+    shared_lock = threading.Lock()
+
+    def shared_read(model_hash: str):
+        with shared_lock:
+            return shared_conn.execute(read_sql, (model_hash,)).fetchall()
+
+    def shared_write(counter: int):
+        with shared_lock:
+            with shared_conn:
+                shared_conn.execute("UPDATE notes SET note = ? WHERE model_hash = ?", (f"Edited {counter}", model_hashes[counter % note_count]))
+
+    def own_read(model_hash: str):
+        return notes.execute_sql(read_sql, model_hash)
+
+    def own_write(counter: int):
+        return notes.set_note(notes.ModelType.LoRA, model_hashes[counter % note_count], f"Edited {counter}")
+
+    print(f"{'readers':>8} {'shared reads/s':>15} {'shared writes/s':>16} {'per thread reads/s':>19} {'per thread writes/s':>20}")
+    for readers in reader_counts:
+        shared_reads, shared_writes = run(shared_read, shared_write, readers, model_hashes, lambda: None)
+        own_reads, own_writes = run(own_read, own_write, readers, model_hashes, notes.close_connection)
+        print(f"{readers:>8} {shared_reads:>15.0f} {shared_writes:>16.0f} {own_reads:>19.0f} {own_writes:>20.0f}")
+    shared_conn.close()
+    notes.close_connections()
+
+if __name__ == "__main__":
+    main()
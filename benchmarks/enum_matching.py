@@ -0,0 +1,60 @@
+"""
+Measures how long it takes to match model type names from API requests to a model type and to calculate Levenshtein distances.
+The current functions are compared with the fuzzy matching of every request against the member names that was used before the alias table.
+"""
+from enum import Enum
+
+from common import load_notes, measure
+
+repeat = 20000
+
+def previous_levenshtein_distance(s1: str, s2: str) -> int:
+    """
+    The Levenshtein distance as it was calculated before, without skipping common prefixes and suffixes and without stopping early.
+    """
+    if len(s1) > len(s2):
+        s1, s2 = s2, s1
+    distances = range(len(s1) + 1)
+    for i2, c2 in enumerate(s2):
+        distances_ = [i2+1]
+        for i1, c1 in enumerate(s1):
+            if c1 == c2:
+                distances_.append(distances[i1])
+            else:
+                distances_.append(1 + min((distances[i1], distances[i1 + 1], distances_[-1])))
+        distances = distances_
+    return distances[-1]
+
+def previous_match_enum(string: str, enum_type: type) -> Enum:
+    """
+    The matching as it was done before, every string is compared with the name of every member.
+    """
+    string = string.lower().replace(" ", "_")
+    closest_match = None
+    closest_distance = float("inf")
+    for member in enum_type:
+        distance = previous_levenshtein_distance(string, member.name.lower())
+        if distance < closest_distance:
+            closest_distance = distance
+            closest_match = member
+    return closest_match
+
+def main() -> None:
+    notes = load_notes()
+    print(f"{'input':<24} {'previous us':>12} {'current us':>11} {'match':>20}")
+    # Tab names the extra networks cards send, other spellings accepted by the API and a typo
+    for string in ["lora", "checkpoints", "textual_inversion", "hypernetworks", "Textual Inversion", "embedding", "ckpt", "txtual_inversion"]:
+        previous = measure(lambda: previous_match_enum(string, notes.ModelType), repeat)
+        current = measure(lambda: notes.match_enum(string, notes.ModelType), repeat)
+        print(f"{string:<24} {previous:>12.2f} {current:>11.2f} {notes.match_enum(string, notes.ModelType).name:>20}")
+
+    print()
+    print(f"{'strings':<54} {'previous us':>12} {'current us':>11} {'bounded us':>11}")
+    for s1, s2 in [("textual_inversion", "textual_inversions"), ("checkpoint", "hypernetwork"), ("a_very_long_model_name_v1", "a_very_long_model_name_v2")]:
+        previous = measure(lambda: previous_levenshtein_distance(s1, s2), repeat)
+        current = measure(lambda: notes.levenshtein_distance(s1, s2), repeat)
+        bounded = measure(lambda: notes.levenshtein_distance(s1, s2, 2), repeat)
+        print(f"{s1 + ' / ' + s2:<54} {previous:>12.2f} {current:>11.2f} {bounded:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measures the size of the database and the time to save and read notes with and without compressing large notes.
+The full-text search index always keeps the plain text, so the database shrinks less than the notes themselves.
+"""
+import os
+import random
+import time
+
+from common import load_notes, measure, open_database
+
+note_count = 2000
+repeat = 2000
+words = "trigger word style portrait landscape anime realistic weight strength recommended sampler steps cfg scale lora checkpoint version".split()
+
+def create_note(size: int) -> str:
+    """
+    Creates a markdown note of about the given size from random words.
+
+    :param size: The size of the note in characters.
+    :return: The note.
+    """
+    lines = ["# Model Description"]
+    length = 0
+    while length < size:
+        line = "- " + " ".join(random.choices(words, k=12))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+def run(notes, compression: bool, note_size: int) -> None:
+    """
+    Saves notes of the given size into a new database, reads them again and prints the results.
+
+    :param notes: The imported extension.
+    :param compression: Whether large notes are compressed.
+    :param note_size: The size of every note in characters.
+    :return: None.
+    """
+    notes.shared.opts.model_note_compression = compression
+    db_file = open_database(notes)
+    model_hashes = [f"{index:064x}" for index in range(note_count)]
+    contents = [create_note(note_size) for _ in model_hashes]
+
+    start = time.perf_counter()
+    notes.set_notes([(notes.ModelType.LoRA, model_hash, content) for model_hash, content in zip(model_hashes, contents)])
+    save_ms = (time.perf_counter() - start) * 1000
+
+    notes.execute_sql("PRAGMA wal_checkpoint(TRUNCATE);")
+    size_kib = os.path.getsize(db_file) / 1024
+
+    def read_uncached():
+        model_hash = random.choice(model_hashes)
+        notes.note_cache.pop(model_hash)
+        notes.get_note(model_hash)
+    read_us = measure(read_uncached, repeat)
+
+    start = time.perf_counter()
+    notes.get_all_notes()
+    read_all_ms = (time.perf_counter() - start) * 1000
+    print(f"{note_size:>10} {'on' if compression else 'off':>12} {size_kib:>10.0f} {save_ms:>10.1f} {read_us:>11.1f} {read_all_ms:>12.1f}")
+
+def main() -> None:
+    notes = load_notes()
+    notes.shared.opts.model_note_compression_threshold = 4096
+    print(f"{note_count} notes, compression threshold {notes.shared.opts.model_note_compression_threshold} bytes")
+    print(f"{'note size':>10} {'compression':>12} {'db KiB':>10} {'save ms':>10} {'read us':>11} {'read all ms':>12}")
+    for note_size in [1000, 5000, 20000]:
+        for compression in [False, True]:
+            run(notes, compression, note_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+let model_notes_civitai_job_polling = false;
+
+// Show the progress of the latest Civitai download job in the Civitai tab and keep polling while it is running
+async function model_notes_poll_civitai_job()
+{
+    if (model_notes_civitai_job_polling) return; // Only poll once at a time
+    model_notes_civitai_job_polling = true;
+    try
+    {
+        while (true)
+        {
+            const statusElement = gradioApp().querySelector('#model_notes_civitai_job_status');
+            if (!statusElement)
+            {
+                // The UI is not rendered yet
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                continue;
+            }
+            const jobs = (await (await fetch('/model_notes/jobs?limit=1')).json()).jobs;
+            if (jobs.length === 0) break;
+
+            const job = await (await fetch(`/model_notes/jobs/${jobs[0].id}`)).json();
+            statusElement.textContent = job.summary;
+            if (job.status !== 'running') break;
+
+            await new Promise(resolve => setTimeout(resolve, 2000)); // Check every 2 seconds
+        }
+    }
+    catch (error)
+    {
+        console.error(error);
+    }
+    model_notes_civitai_job_polling = false;
+}
+
+document.addEventListener('click', function(event)
+{
+    // Starting or cancelling a job happens in a gradio request, give it a moment before asking for the status
+    if (event.target.closest('#model_notes_civitai_start, #model_notes_civitai_cancel'))
+    {
+        setTimeout(model_notes_poll_civitai_job, 1000);
+    }
+});
+
+// Show jobs that are still running from a previous visit
+window.addEventListener('load', model_notes_poll_civitai_job);
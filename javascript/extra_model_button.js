@@ -1,68 +1,174 @@
-// Store the previous checkpoint hash value
-function setup_note_extra_models()
+// Style of the note buttons, hover effects are done in css so cards need no listeners of their own
+function model_notes_add_card_style()
 {
-    // Get all elements with class "card"
-    const cardElements = document.getElementsByClassName("card");
+    if (document.getElementById("model_notes_card_style"))
+    {
+        return;
+    }
+    const style = document.createElement("style");
+    style.id = "model_notes_card_style";
+    style.textContent = `
+        .card .model_notes_card_button { position: absolute; top: 10px; left: 10px; }
+        .card .model_notes_card_icon { display: inline-block; font-size: 30px; transition: transform 0.1s, background-color 0.1s; border-radius: 5px; padding-left: 2.5px; background-color: transparent; }
+        .card .model_notes_card_button:hover .model_notes_card_icon { background-color: rgba(0, 128, 255, 0.2); transform: scale(1.1); }
+    `;
+    document.head.appendChild(style);
+}
 
-    // Loop through each card element
-    Array.from(cardElements).forEach(card => 
+// Add the note button to a single card, cards that already have one are marked and skipped
+function model_notes_decorate_card(card)
+{
+    if (card.dataset.modelNotes)
     {
-        // Create a new Gradio button container element
-        const buttonContainer = document.createElement("div");
-        buttonContainer.style.position = "absolute";
-        buttonContainer.style.top = "10px";
-        buttonContainer.style.left = "10px";
-
-        // Create a span element for the emoji
-        const emojiSpan = document.createElement("span");
-        emojiSpan.innerHTML = "&#x1F4DD;"; // set emoji content to pencil emoji
-        emojiSpan.style.fontSize = "30px"; // increase emoji size
-        emojiSpan.style.transition = "transform 0.1s, background-color 0.1s"; // add transition effect
-        emojiSpan.style.borderRadius = "5px"; // set border radius
-        emojiSpan.style.paddingLeft = "2.5px"; // set padding on the left side
-        emojiSpan.style.backgroundColor = "transparent"; // set transparent background color
-        emojiSpan.id = "model_note_extra_model_icon";
-
-        // Add hover effect to the button container
-        const onMouseOver = () => 
-        {
-            emojiSpan.style.backgroundColor = "rgba(0, 128, 255, 0.2)"; // set background color
-            emojiSpan.style.transform = "scale(1.1)"; // scale up the size
-        };
-        const onMouseOut = () => 
-        {
-            emojiSpan.style.backgroundColor = "transparent"; // set transparent background color
-            emojiSpan.style.transform = "scale(1)"; // reset the size
-        };
-        buttonContainer.addEventListener("mouseover", onMouseOver);
-        buttonContainer.addEventListener("mouseout", onMouseOut);
+        return;
+    }
+    card.dataset.modelNotes = "true";
+
+    // Create a new button container element with a span element for the emoji
+    const buttonContainer = document.createElement("div");
+    buttonContainer.className = "model_notes_card_button";
+    const emojiSpan = document.createElement("span");
+    emojiSpan.innerHTML = "&#x1F4DD;"; // set emoji content to pencil emoji
+    emojiSpan.className = "model_notes_card_icon";
+    emojiSpan.id = "model_note_extra_model_icon";
+    buttonContainer.appendChild(emojiSpan);
+    card.appendChild(buttonContainer);
+}
+
+// Add the note button to all cards in an element that don't have one yet
+function setup_note_extra_models(root = document)
+{
+    model_notes_add_card_style();
+    if (root.classList && root.classList.contains("card"))
+    {
+        model_notes_decorate_card(root);
+        return;
+    }
+    Array.from(root.querySelectorAll(".card:not([data-model-notes])")).forEach(model_notes_decorate_card);
+}
+
+// Handles the clicks on the note buttons of all cards in an extra networks element with a single listener
+function model_notes_on_card_click(event)
+{
+    const buttonContainer = event.target.closest(".model_notes_card_button");
+    if (!buttonContainer)
+    {
+        return;
+    }
+    event.stopPropagation(); // The listener runs in the capture phase, so the card never sees the click
+
+    const card = buttonContainer.closest(".card");
+    // Get the "name" div element
+    const nameDiv = card.querySelector(".actions .name");
+    // Get the tab name from the card container id
+    const selectedTabText = card.parentElement.id.replace(/.*?_(.*)_cards/, '$1');
+
+    // Call the create_popup function with the name and selected tab text as arguments
+    note_extra_models_create_popup(nameDiv.textContent, selectedTabText, card);
+}
+
+// The active note filter of every card container, see model_notes_filter_cards
+const model_notes_card_filters = {};
 
-        // Append the emoji span element to the button container element
-        buttonContainer.appendChild(emojiSpan);
+function model_notes_setup_card_filters()
+{
+    // Hiding a card is a single class toggle, so filtering never re-renders the cards
+    if (!document.getElementById("model_notes_card_filter_style"))
+    {
+        const style = document.createElement("style");
+        style.id = "model_notes_card_filter_style";
+        style.textContent = ".card.model_notes_filtered_out { display: none !important; }";
+        document.head.appendChild(style);
+    }
 
-        // Add click event listener to the button container
-        const onClick = event => 
+    // Add a filter box above every container of cards, the box is removed together with the cards when they are refreshed
+    document.querySelectorAll('div[id$="_cards"]').forEach(cards =>
+    {
+        if (!/^(txt2img|img2img)_.*_cards$/.test(cards.id) || document.getElementById(cards.id + "_model_notes_filter"))
         {
-            event.stopPropagation(); // stop event propagation
+            return;
+        }
+        const filterBox = document.createElement("input");
+        filterBox.type = "search";
+        filterBox.id = cards.id + "_model_notes_filter";
+        filterBox.placeholder = "Filter by note...";
+        filterBox.title = "Only show models whose note contains all of these words";
+        filterBox.style.margin = "0 0 8px 0";
+        filterBox.style.width = "100%";
+        filterBox.value = model_notes_card_filters[cards.id] ? model_notes_card_filters[cards.id].query : "";
 
-            // Get the "name" div element
-            const nameDiv = card.querySelector(".actions .name");
-            // Get the text content of the "name" div
-            const nameText = nameDiv.textContent;
+        let debounceTimer = null;
+        filterBox.addEventListener("input", () =>
+        {
+            clearTimeout(debounceTimer);
+            debounceTimer = setTimeout(() => model_notes_filter_cards(cards.id, filterBox.value), 300);
+        });
+        cards.parentElement.insertBefore(filterBox, cards);
 
-            // Get the tab name from the card container id
-            const selectedTabText = card.parentElement.id.replace(/.*?_(.*)_cards/, '$1');
+        // Apply an active filter to the new cards after a refresh
+        model_notes_apply_card_filter(cards.id);
+    });
+}
 
-            // Call the create_popup function with the name and selected tab text as arguments
-            note_extra_models_create_popup(nameText, selectedTabText, card);
+async function model_notes_filter_cards(cardsId, query)
+{
+    // Cancel the request of the previous filter, its result would be thrown away anyway
+    const previous = model_notes_card_filters[cardsId];
+    if (previous && !previous.ranks)
+    {
+        previous.controller.abort();
+    }
+    if (query.trim() === "")
+    {
+        delete model_notes_card_filters[cardsId];
+        model_notes_apply_card_filter(cardsId);
+        return;
+    }
+    const filter = { query: query, ranks: null, controller: new AbortController() };
+    model_notes_card_filters[cardsId] = filter;
 
-            // Set the background color of the emoji span to the hover color of the card
-            emojiSpan.style.backgroundColor = "rgba(0, 128, 255, 0.2)";
-        };
-        buttonContainer.addEventListener("click", onClick);
+    // Get the tab name from the card container id
+    const modelType = cardsId.replace(/.*?_(.*)_cards/, '$1');
+    try
+    {
+        const response = await fetch(`/model_notes/filter?q=${encodeURIComponent(query)}&type=${encodeURIComponent(modelType)}`, { signal: filter.controller.signal });
+        const data = await response.json();
+        if (model_notes_card_filters[cardsId] !== filter)
+        {
+            return; // A newer filter was entered while waiting
+        }
+        filter.ranks = new Map(data.names.map((name, index) => [name, index]));
+        model_notes_apply_card_filter(cardsId);
+    }
+    catch (error)
+    {
+        if (error.name !== "AbortError")
+        {
+            console.error("Failed to filter the cards by note:", error);
+        }
+    }
+}
 
-        // Append the button container element to the card element
-        card.appendChild(buttonContainer);
+function model_notes_apply_card_filter(cardsId)
+{
+    const cards = document.getElementById(cardsId);
+    const filter = model_notes_card_filters[cardsId];
+    if (!cards || (filter && !filter.ranks))
+    {
+        return;
+    }
+    Array.from(cards.getElementsByClassName("card")).forEach(card =>
+    {
+        if (!filter)
+        {
+            card.classList.remove("model_notes_filtered_out");
+            card.style.order = "";
+            return;
+        }
+        const nameDiv = card.querySelector(".actions .name");
+        const rank = nameDiv ? filter.ranks.get(nameDiv.textContent) : undefined;
+        card.classList.toggle("model_notes_filtered_out", rank === undefined);
+        card.style.order = rank === undefined ? "" : rank; // Sorts the best matches first
     });
 }
 
@@ -77,9 +183,11 @@ function model_notes_extra_model_button_setup()
                 if (entry.isIntersecting) 
                 {
                     // Add the note button to the model cards
-                    setup_note_extra_models();
-                    model_notes_extra_model_button_refresh_setup(); // Setup for the refresh button
-                    // We only need to hide note previews once so remove the observer
+                    setup_note_extra_models(entry.target);
+                    model_notes_setup_card_filters();
+                    model_notes_setup_prefetch();
+                    model_notes_observe_new_cards(entry.target); // Setup for refreshed cards
+                    // New cards are found by the mutation observer, so remove this observer
                     observer.unobserve(entry.target);
                 }
         });
@@ -88,38 +196,49 @@ function model_notes_extra_model_button_setup()
     // Get all elements with the class "extra-networks"
     const elements = document.querySelectorAll('.extra-networks');
 
-    // Observe each element
+    // Observe each element and handle the clicks of all its note buttons
     elements.forEach(element => {
+        element.addEventListener("click", model_notes_on_card_click, true);
         observer.observe(element);
     });
 }
 
-function model_notes_extra_model_button_refresh_setup() 
+function model_notes_observe_new_cards(element) 
 {
-    // Select the container for all embedding cards and take the parent of the parent which gets a "pending" class when the cards are refreshed
-    const element = document.getElementById('txt2img_textual_inversion_cards').parentElement.parentElement;
-
-    // Create a new MutationObserver
+    // Only the inserted elements are decorated, so refreshing thousands of cards does not rescan the existing ones
     const observer = new MutationObserver(function(mutationsList) {
-    for (let mutation of mutationsList) 
-    {
-        if 
-        (
-            mutation.type === 'attributes' &&
-            mutation.attributeName === 'class' &&
-            !element.classList.contains('pending') &&
-            mutation.oldValue && mutation.oldValue.includes('pending')
-        ) 
+        let newContainer = false;
+        const changedContainers = new Set();
+        for (let mutation of mutationsList) 
         {
-            // "pending" class has been removed, readd the note button to new cards
-            setup_note_extra_models();
-            break;
+            mutation.addedNodes.forEach(node =>
+            {
+                if (node.nodeType !== Node.ELEMENT_NODE)
+                {
+                    return;
+                }
+                setup_note_extra_models(node);
+                if ((node.id && node.id.endsWith("_cards")) || node.querySelector('div[id$="_cards"]'))
+                {
+                    newContainer = true;
+                }
+                else if (node.classList.contains("card") && node.parentElement)
+                {
+                    changedContainers.add(node.parentElement.id);
+                }
+            });
+        }
+        // Apply an active filter once per container instead of once per card
+        changedContainers.forEach(cardsId => model_notes_apply_card_filter(cardsId));
+        if (newContainer)
+        {
+            model_notes_setup_card_filters();
+            model_notes_setup_prefetch();
         }
-    }
     });
 
-    // Start observing the class attribute for changes
-    observer.observe(element, { attributes: true, attributeOldValue: true });
+    // Start observing all elements that are added below the extra networks
+    observer.observe(element, { childList: true, subtree: true });
 }
 
 window.addEventListener('DOMContentLoaded', function() 
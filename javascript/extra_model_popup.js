@@ -1,30 +1,252 @@
 let model_notes_isPopupOpen = false;
 
-// Save note using API
-async function model_notes_saveNote(model_type, name, note) 
+// Notes with their version by model type and name and rendered markdown by text, so popups open without asking the server
+const model_notes_note_cache = new Map();
+const model_notes_html_cache = new Map();
+const model_notes_save_times = new Map(); // When the last save of a note was sent, so older responses do not replace it in the cache
+const model_notes_note_cache_size = 5000;
+const model_notes_html_cache_size = 500;
+const model_notes_max_hash_polls = 300; // Seconds to wait for a model to be hashed before the popup gives up
+
+function model_notes_cache_key(model_type, name)
 {
-  const url = `/model_notes/set_note_by_name?type=${encodeURIComponent(model_type)}&name=${encodeURIComponent(name)}&note=${encodeURIComponent(note)}`;
+  return `${model_type}\u0000${name}`;
+}
 
+// Add an entry to a cache, dropping the least recently used entries when it is full
+function model_notes_cache_set(cache, key, value, max_size)
+{
+  cache.delete(key);
+  cache.set(key, value);
+  while (cache.size > max_size)
+  {
+    cache.delete(cache.keys().next().value);
+  }
+}
+
+// Save note using API, keepalive lets the request finish while the page is closed
+async function model_notes_saveNote(model_type, name, note, keepalive = false) 
+{
+  const key = model_notes_cache_key(model_type, name);
+  model_notes_cache_set(model_notes_save_times, key, performance.now(), model_notes_note_cache_size);
   try {
-    const response = await fetch(url, { method: "POST" });
+    const response = await fetch("/model_notes/set_note", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ type: model_type, name: name, note: note }),
+      keepalive: keepalive,
+    });
     const data = await response.json();
+    if (data.success)
+    {
+      model_notes_cache_set(model_notes_note_cache, key, { note: note, version: data.version }, model_notes_note_cache_size);
+    }
+    else
+    {
+      model_notes_note_cache.delete(key);
+    }
+    return data.success;
   } catch (error) {
+    model_notes_note_cache.delete(key);
     console.error(error);
+    return false;
   }
 }
 
-// Get note using API
+// All autosaves with unsaved changes, flushed when the page is closed
+const model_notes_active_autosaves = new Set();
+
+// Saves a note once it was not edited for the autosave delay, edits made in the meantime replace each other
+function model_notes_create_autosave(model_type, name, onSaved, statusElement)
+{
+  const delay = (opts.model_note_autosave_delay || 1) * 1000;
+  let pendingNote = null; // The newest note that was not sent yet
+  let timer = null;
+  let saving = Promise.resolve(); // Saves run one after another, so an older note never overwrites a newer one
+
+  const setStatus = text => { if (statusElement) statusElement.textContent = text; };
+
+  const sendLatest = async () =>
+  {
+    if (pendingNote === null)
+    {
+      return; // Already sent by an earlier save
+    }
+    const note = pendingNote;
+    pendingNote = null;
+    setStatus("Saving...");
+    const success = await model_notes_saveNote(model_type, name, note);
+    if (pendingNote !== null)
+    {
+      setStatus("Unsaved changes"); // Newer edits are waiting for their own save
+      return;
+    }
+    if (success)
+    {
+      model_notes_active_autosaves.delete(autosave);
+      setStatus("Saved");
+      onSaved(note);
+    }
+    else
+    {
+      pendingNote = note; // Try again with the next save
+      setStatus("Failed to save, see the console");
+    }
+  };
+
+  const autosave = {
+    edit(note)
+    {
+      pendingNote = note;
+      model_notes_active_autosaves.add(autosave);
+      setStatus("Unsaved changes");
+      clearTimeout(timer);
+      timer = setTimeout(() => autosave.flush(), delay);
+    },
+    flush(keepalive = false)
+    {
+      clearTimeout(timer);
+      if (keepalive && pendingNote !== null)
+      {
+        // The page is closing, there is no time to wait for earlier saves
+        model_notes_saveNote(model_type, name, pendingNote, true);
+        pendingNote = null;
+        return saving;
+      }
+      saving = saving.then(sendLatest);
+      return saving;
+    },
+  };
+  return autosave;
+}
+
+window.addEventListener("pagehide", () =>
+{
+  model_notes_active_autosaves.forEach(autosave => autosave.flush(true));
+});
+
+// Whether a note was saved after the given time, so a response to an earlier request may hold an older note
+function model_notes_saved_since(key, time)
+{
+  return model_notes_save_times.has(key) && model_notes_save_times.get(key) >= time;
+}
+
+// Get note using API, a cached note is only sent again by the server if it changed in the meantime
 async function model_notes_getNote(name, model_type) {
-  const response = await fetch(`/model_notes/get_note_by_name?name=${encodeURIComponent(name)}&type=${encodeURIComponent(model_type)}`);
-  const data = await response.json();
-  return data.note;
+  const key = model_notes_cache_key(model_type, name);
+  const cached = model_notes_note_cache.get(key);
+  const version = cached ? `&version=${encodeURIComponent(cached.version)}` : "";
+  const requestTime = performance.now();
+  for (let attempt = 0; attempt < model_notes_max_hash_polls; attempt++)
+  {
+    const response = await fetch(`/model_notes/get_note_by_name?name=${encodeURIComponent(name)}&type=${encodeURIComponent(model_type)}${version}`);
+    const data = await response.json();
+    if (!response.ok)
+    {
+      throw new Error(`Failed to get the note of ${name}: ${data.error}`);
+    }
+    if (!data.pending)
+    {
+      if (data.unchanged)
+      {
+        return cached.note;
+      }
+      if (!model_notes_saved_since(key, requestTime))
+      {
+        model_notes_cache_set(model_notes_note_cache, key, { note: data.note, version: data.version }, model_notes_note_cache_size);
+      }
+      return data.note;
+    }
+    // The model is still being hashed in the background, ask again in a moment
+    await new Promise(resolve => setTimeout(resolve, 1000));
+  }
+  throw new Error(`Gave up waiting for ${name} to be hashed`);
+}
+
+// Get the notes of all cards in a container with a single request
+async function model_notes_prefetch_notes(cardsId)
+{
+  const cards = document.getElementById(cardsId);
+  if (!cards)
+  {
+    return;
+  }
+  // Get the tab name from the card container id
+  const model_type = cardsId.replace(/.*?_(.*)_cards/, '$1');
+  const names = Array.from(cards.querySelectorAll(".card .actions .name")).map(nameDiv => nameDiv.textContent);
+  if (names.length === 0)
+  {
+    return;
+  }
+  const markdown = document.getElementById("model_notes_markdown_template") !== null;
+  const requestTime = performance.now();
+  try {
+    const response = await fetch(`/model_notes/get_notes?include_html=${markdown}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(names.map(name => ({ type: model_type, name: name }))),
+    });
+    const data = await response.json();
+    data.results.forEach(result => {
+      if (result.pending)
+      {
+        return; // Fetched when the popup is opened
+      }
+      const key = model_notes_cache_key(model_type, result.name);
+      if (model_notes_saved_since(key, requestTime))
+      {
+        return; // The response may have been read before the note was saved
+      }
+      model_notes_cache_set(model_notes_note_cache, key, { note: result.note, version: result.version }, model_notes_note_cache_size);
+      if (markdown)
+      {
+        model_notes_cache_set(model_notes_html_cache, result.note, result.html, model_notes_html_cache_size);
+      }
+    });
+  } catch (error) {
+    console.error("Failed to prefetch the notes:", error);
+  }
+}
+
+// Prefetch the notes of a card container every time it becomes visible, for example when its tab is selected
+function model_notes_setup_prefetch()
+{
+  const observer = new IntersectionObserver((entries) =>
+  {
+    entries.forEach(entry =>
+    {
+      if (entry.isIntersecting)
+      {
+        model_notes_prefetch_notes(entry.target.id);
+      }
+    });
+  });
+  document.querySelectorAll('div[id$="_cards"]').forEach(cards =>
+  {
+    if (/^(txt2img|img2img)_.*_cards$/.test(cards.id) && !cards.dataset.modelNotesPrefetch)
+    {
+      cards.dataset.modelNotesPrefetch = "true";
+      observer.observe(cards);
+    }
+  });
 }
 
 // Convert markdown to HTML
 async function model_notes_convert_markdown_to_html(markdown) 
 {
-  const response = await fetch(`/model_notes/utils/convert_markdown_to_html?text=${encodeURIComponent(markdown)}`);
+  if (model_notes_html_cache.has(markdown))
+  {
+    const html = model_notes_html_cache.get(markdown);
+    model_notes_cache_set(model_notes_html_cache, markdown, html, model_notes_html_cache_size);
+    return html;
+  }
+  const response = await fetch("/model_notes/utils/convert_markdown_to_html", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ text: markdown }),
+  });
   const data = await response.json();
+  model_notes_cache_set(model_notes_html_cache, markdown, data.html, model_notes_html_cache_size);
   return data.html;
 }
 
@@ -48,6 +270,10 @@ function model_notes_closePopup(popup) {
   popupOverlay.style.backgroundColor = "rgba(0, 0, 0, 0)";
   popupContent.style.transform = "scale(0.9)";
   popupContent.style.opacity = "0";
+  if (popup.model_notes_autosave)
+  {
+    popup.model_notes_autosave.flush(); // Save edits that are still waiting for the autosave delay
+  }
   setTimeout(() => {
     document.body.style.overflow = "auto";
     document.body.removeChild(popup);
@@ -68,6 +294,15 @@ async function note_extra_models_create_popup(name, model_type, card)
   if (model_notes_isPopupOpen) return; // Prevent opening multiple popups
 
   model_notes_isPopupOpen = true;
+  const key = model_notes_cache_key(model_type, name);
+  const cached = model_notes_note_cache.get(key);
+  if (cached)
+  {
+    // The note was prefetched, open the popup right away and show the note from the server if it was changed elsewhere
+    const popup = model_notes_create_actual_popup(name, model_type, cached.note, true, card);
+    model_notes_getNote(name, model_type).then(note => popup.model_notes_replace_note(note)).catch(console.error);
+    return;
+  }
   const icons = document.querySelectorAll('#model_note_extra_model_icon');
   icons.forEach(icon => {
     icon.style.cursor = 'progress';
@@ -226,17 +461,25 @@ function model_notes_create_actual_popup(name, model_type, note, markdown, card)
   }
   if (!saveModelNoteElement)
   {
-    textBox.addEventListener("input", async () => 
+    // Set up the autosave state below the buttons
+    const autosaveStatus = document.createElement("div");
+    autosaveStatus.id = "model_notes_autosave_status";
+    autosaveStatus.style.cssText = `color: ${color}; opacity: 0.7; font-size: small; margin-top: 5px; min-height: 1em;`;
+    container.appendChild(autosaveStatus);
+
+    const autosave = model_notes_create_autosave(model_type, name, (savedNote) =>
     {
-      await model_notes_saveNote(model_type, name, textBox.value);
       if (!opts.model_note_hide_extra_note_preview && opts.model_note_hide_extra_note_inject)
       {
-        model_notes_extra_model_inject_new_description(textBox.value, card);
+        model_notes_extra_model_inject_new_description(savedNote, card);
       }
-    });
-}
+    }, autosaveStatus);
+    popup.model_notes_autosave = autosave;
+    textBox.addEventListener("input", () => autosave.edit(textBox.value));
+  }
 
   textContainer.appendChild(textBox);
+  let renderMarkdown = null;
   if (markdownTemplate)
   {
     const markdownContainer = document.createElement("div");
@@ -250,7 +493,7 @@ function model_notes_create_actual_popup(name, model_type, note, markdown, card)
     textContainer.style.flexDirection = "row";
     textContainer.style.justifyContent = "center";
     textContainer.appendChild(markdownContainer);
-    textBox.addEventListener("input", async () => 
+    renderMarkdown = async () => 
     {
       const new_html = await model_notes_convert_markdown_to_html(textBox.value);
       markdownContainer.innerHTML = new_html;
@@ -262,10 +505,26 @@ function model_notes_create_actual_popup(name, model_type, note, markdown, card)
         img.style.maxWidth = "100%";
         img.style.height = "auto";
       }
-    });
-    textBox.dispatchEvent(new Event('input')); // Sets the markdown text
+    };
+    textBox.addEventListener("input", renderMarkdown);
+    renderMarkdown(); // Sets the markdown text without an input event, which would autosave the unchanged note
   }
 
+  // Show a newer note unless the shown one was already edited
+  popup.model_notes_replace_note = (newNote) =>
+  {
+    if (newNote === note || textBox.value !== note)
+    {
+      return;
+    }
+    note = newNote;
+    textBox.value = newNote;
+    if (renderMarkdown)
+    {
+      renderMarkdown();
+    }
+  };
+
   popupContent.appendChild(popupTitle);
   popupContent.appendChild(closeButton);
   popupContent.appendChild(textContainer);
@@ -284,4 +543,5 @@ function model_notes_create_actual_popup(name, model_type, note, markdown, card)
   window.addEventListener("resize", () => {
     popupTitle.style.fontSize = `${popup.clientWidth * 0.025}px`;
   });
+  return popup;
 };
\ No newline at end of file
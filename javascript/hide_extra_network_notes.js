@@ -1,75 +1,20 @@
 function hide_extra_network_notes()
 {
-    // Get all descriptions from the extra network notes
-    const descriptionElements = document.getElementsByClassName('description');
-
-    // Loop through the elements and hide them
-    for (let i = 0; i < descriptionElements.length; i++) {
-    const element = descriptionElements[i];
-    element.style.display = 'none';
-    }
-
-}
-
-function model_notes_hide_extra_network_notes_setup()
-{
-    // Create a new Intersection Observer instance for the extra network tabs
-    const observer = new IntersectionObserver((entries, observer) => 
-    {
-        entries.forEach(entry => 
-            {
-                // Check if the element is intersecting/visible
-                if (entry.isIntersecting) 
-                {
-                    // Hide the note previews
-                    hide_extra_network_notes();
-                    hide_extra_network_notes_refresh_setup(); // Setup for the refresh button
-                    // We only need to hide note previews once so remove the observer
-                    observer.unobserve(entry.target);
-                }
-        });
-    });
-
-    // Get all elements with the class "extra-networks"
-    const elements = document.querySelectorAll('.extra-networks');
-
-    // Observe each element
-    elements.forEach(element => {
-        observer.observe(element);
-    });
-}
-
-function hide_extra_network_notes_refresh_setup() 
-{
-    // Select the container for all embedding cards and take the parent of the parent which gets a "pending" class when the cards are refreshed
-    const element = document.getElementById('txt2img_textual_inversion_cards').parentElement.parentElement;
-
-    // Create a new MutationObserver
-    const observer = new MutationObserver(function(mutationsList) {
-    for (let mutation of mutationsList) 
+    // Hide the descriptions of all cards with a single css rule, so cards added by a refresh are hidden without scanning them
+    if (document.getElementById("model_notes_hide_descriptions_style"))
     {
-        if (
-            mutation.type === 'attributes' &&
-            mutation.attributeName === 'class' &&
-            !element.classList.contains('pending') &&
-            mutation.oldValue && mutation.oldValue.includes('pending')
-        ) 
-        {
-        // "pending" class has been removed, hide any new note previews
-        hide_extra_network_notes();
-        break;
-        }
+        return;
     }
-    });
-
-    // Start observing the class attribute for changes
-    observer.observe(element, { attributes: true, attributeOldValue: true });
+    const style = document.createElement("style");
+    style.id = "model_notes_hide_descriptions_style";
+    style.textContent = ".extra-networks .card .description { display: none !important; }";
+    document.head.appendChild(style);
 }
 
 window.addEventListener('load', function() 
 {
     if (opts.model_note_hide_extra_note_preview)
     {
-        model_notes_hide_extra_network_notes_setup();
+        hide_extra_network_notes();
     }
-});
\ No newline at end of file
+});
@@ -1,27 +1,66 @@
-// Store the previous checkpoint hash value
-let previousCheckpointHash = opts.sd_checkpoint_hash;
+// The version of the loaded checkpoint that the notes were last updated for
+let model_notes_loaded_model_version = -1;
 
-function setup_note_interval()
+async function model_notes_wait_for_checkpoint()
 {
-  setInterval(function() 
+  // A single request waits on the server until another checkpoint is loaded, so there is nothing to poll
+  while (true)
   {
-    // When a new model was selected, update the note
-    if (opts.sd_checkpoint_hash !== previousCheckpointHash) 
+    try
     {
-      previousCheckpointHash = opts.sd_checkpoint_hash;
-      triggerOnCheckpointChange();
+      const response = await fetch(`/model_notes/loaded_model?version=${model_notes_loaded_model_version}&timeout=30`);
+      if (!response.ok)
+      {
+        throw new Error(`HTTP ${response.status}`);
+      }
+      const data = await response.json();
+      if (data.version !== model_notes_loaded_model_version)
+      {
+        if (update_checkpoint_notes(data.name, data.note))
+        {
+          model_notes_loaded_model_version = data.version;
+        }
+        else
+        {
+          // The note boxes are not shown yet, ask again for the same checkpoint
+          await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+      }
     }
-  }, 500); // Check every 500 ms
+    catch (error)
+    {
+      // The server is restarting or unreachable, try again later
+      await new Promise(resolve => setTimeout(resolve, 5000));
+    }
+  }
 }
 
-function triggerOnCheckpointChange() 
+function update_checkpoint_notes(name, note)
 {
-  // Create an update event and update notes in every tab
-  gradioApp().querySelectorAll('#model_note_update').forEach(function(refresh_button) 
+  // Update the note in every tab with the one response
+  const textboxes = gradioApp().querySelectorAll('#notes_container #model_notes_textbox');
+  let updated = false;
+  textboxes.forEach(function(textbox)
   {
-    refresh_button.click();
+    const label = textbox.querySelector('label > span');
+    if (label && name)
+    {
+      label.textContent = `Note on ${name}`;
+    }
+    const textarea = textbox.querySelector('textarea');
+    if (!textarea)
+    {
+      return;
+    }
+    if (textarea.value !== note)
+    {
+      textarea.value = note;
+      updateInput(textarea); // Let gradio know about the new value
+    }
+    updated = true;
   });
+  return updated;
 }
 
-// Wait until all DOM Content is loaded before checking for new models
-document.addEventListener('DOMContentLoaded', setup_note_interval);
\ No newline at end of file
+// Wait until the UI with the note boxes is loaded before waiting for new models
+onUiLoaded(model_notes_wait_for_checkpoint);
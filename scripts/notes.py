@@ -1,8 +1,9 @@
-from typing import List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from bs4 import BeautifulSoup
 import gradio as gr
 from gradio import utils
 import inspect
+import asyncio
 from modules import script_callbacks, scripts, hashes
 from modules.sd_models import CheckpointInfo, checkpoint_tiles, checkpoint_alisases, list_models
 from modules.sd_hijack import model_hijack
@@ -17,17 +18,28 @@ import sqlite3
 from sqlite3 import Error
 from pathlib import Path
 import requests
+import requests.adapters
 from requests.models import Response
 from bs4 import BeautifulSoup
 from enum import Enum
 from modules.paths_internal import extensions_builtin_dir
 from starlette.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
 import sys
 import threading
 import time
+import html
 import html2markdown
 import csv
 import os
+import hashlib
+import json
+import tempfile
+import zlib
+from PIL import Image
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
 # Build-in extensions are loaded after extensions so we need to add it manually
 sys.path.append(str(Path(extensions_builtin_dir, "Lora")))
@@ -37,10 +49,23 @@ from ui_extra_networks_lora import ExtraNetworksPageLora
 sys.path.remove(str(Path(extensions_builtin_dir, "Lora")))
 
 notes_symbol = '\U0001F4DD' # 📝
-conn = None
-conn_lock = threading.Lock()
+db_file_path = None
+conn_local = threading.local() # Holds the database connection of every thread
+connections : Dict[threading.Thread, sqlite3.Connection] = {} # The open database connection of every thread
+connections_lock = threading.Lock()
+write_lock = threading.Lock()
+hash_index : Dict[str, Tuple[int, float, str]] = {} # Maps model paths to their size, modification time and sha256
+hash_index_lock = threading.Lock()
+hash_index_generation = 0 # Increased whenever hashes are added to the hash index
+hash_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model_notes_hash")
+pending_hashes : Dict[str, Future] = {}
+failed_hashes : Dict[str, Tuple[int, float]] = {} # Maps model paths that could not be hashed to their size and modification time, they are only hashed again once the file changed
+search_index_available = False # Whether SQLite supports FTS5, see setup_search_index
 shared.reload_hypernetworks() # No hypernetworks are loaded yet so we have to load the manually
 md_renderer = utils.get_markdown_parser()
+current_umask = os.umask(0o022) # There is no way to only read the umask
+os.umask(current_umask)
+default_file_mode = 0o666 & ~current_umask # Temporary files are only readable by us, so written files get the permissions a normal file would get
 
 class ModelType(Enum):
     """
@@ -59,6 +84,14 @@ class ResultType(Enum):
     not_found = 2
     error = 3
     skipped = 4
+    unchanged = 5
+
+class NoteFormat(Enum):
+    """
+    Enumeration of the ways a note is stored in the database.
+    """
+    plain = 0
+    zlib = 1
 
 class FileTypes(Enum):
     """
@@ -96,29 +129,275 @@ class FileTypes(Enum):
                 return filetype
         raise ValueError(f"Unknown description: {description_str}")
 
+class LRUCache:
+    """
+    A thread-safe, size bounded least recently used cache that counts its hits, misses and evictions.
+
+    :param max_size: The maximum number of entries kept in the cache.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0 # Counts the changes made with `set`, `pop` and `clear`
+        self._entries : OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for the given key and marks it as recently used.
+
+        :param key: The key of the entry.
+        :param default: The value returned if the key is not cached.
+        :return: The cached value or the default.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def set(self, key, value) -> None:
+        """
+        Adds or replaces an entry and evicts the least recently used entries if the cache is full.
+
+        :param key: The key of the entry.
+        :param value: The value of the entry.
+        :return: None.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def fill(self, key, value, generation: int) -> bool:
+        """
+        Adds a value that was read from its source unless the cache was changed since the read started.
+        Otherwise the value could be older than the one a concurrent writer just put in the cache.
+
+        :param key: The key of the entry.
+        :param value: The value of the entry.
+        :param generation: The `generation` of the cache before the value was read.
+        :return: Whether the value was added.
+        """
+        with self._lock:
+            if self.generation != generation:
+                return False
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict()
+            return True
+
+    def pop(self, key) -> None:
+        """
+        Removes the entry for the given key if it exists.
+
+        :param key: The key of the entry.
+        :return: None.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes all entries.
+
+        :return: None.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def resize(self, max_size: int) -> None:
+        """
+        Changes the maximum size of the cache and evicts entries if needed.
+
+        :param max_size: The new maximum number of entries.
+        :return: None.
+        """
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the current size and the counters of the cache.
+
+        :return: A dictionary containing the size, maximum size, hits, misses and evictions.
+        """
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _evict(self) -> None:
+        while len(self._entries) > max(self.max_size, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+class ModelTypeInfo:
+    """
+    Describes how the models of a model type are listed and found on disk.
+
+    :param model_type: The type of the models.
+    :param label: The name of the model type shown in the UI.
+    :param select_label: The name of a single model of this type shown in the UI.
+    :param list_models: Returns the names of all models of this type.
+    :param get_file: Returns the file path and the title used in the hash cache of the webui for a model name or (None, None) if the model does not exist.
+    :param refresh: Reloads the list of models.
+    :param extra_page: The extra networks page showing the models of this type.
+    :param preview_suffix: The suffix added to the model path before the extension of downloaded preview images.
+    :param list_choices: Returns the names shown in the model selection, defaults to `list_models`.
+    :param aliases: Other names of the model type that API requests may use.
+    """
+
+    def __init__(self, model_type: ModelType, label: str, select_label: str, list_models: Callable[[], List[str]], get_file: Callable[[str], Tuple[Optional[str], Optional[str]]], refresh: Callable[[], None], extra_page: type, preview_suffix: str, list_choices: Optional[Callable[[], List[str]]] = None, aliases: Iterable[str] = ()):
+        self.model_type = model_type
+        self.label = label
+        self.select_label = select_label
+        self.list_models = list_models
+        self.get_file = get_file
+        self.refresh = refresh
+        self.extra_page = extra_page
+        self.preview_suffix = preview_suffix
+        self.list_choices = list_choices or list_models
+        self.aliases = list(aliases)
+
+class ModelRecord(NamedTuple):
+    """
+    A single model on disk.
+    """
+    model_type: ModelType
+    name: str
+    path: str
+    sha256: Optional[str]
+
+model_type_infos : Dict[ModelType, ModelTypeInfo] = {} # All supported model types in the order they are shown
+
+def register_model_type(info: ModelTypeInfo) -> None:
+    """
+    Adds support for a model type to the notes tab, the extra networks, the Civitai download, the import and the export.
+
+    :param info: The description of the model type.
+    :return: None.
+    """
+    model_type_infos[info.model_type] = info
+    get_enum_aliases(ModelType)
+    add_enum_alias(info.label, info.model_type) # The extra network tabs are named after the labels
+    add_enum_alias(info.select_label, info.model_type)
+    for alias in info.aliases:
+        add_enum_alias(alias, info.model_type)
+
+def get_model_type_by_label(label: str) -> Optional[ModelType]:
+    """
+    Returns the model type with the given label.
+
+    :param label: The name of the model type shown in the UI.
+    :return: The model type or None if no model type has this label.
+    """
+    return next((info.model_type for info in model_type_infos.values() if info.label == label), None)
+
+note_cache = LRUCache(max_size=4096)
+html_cache = LRUCache(max_size=1024) # Maps the content hash of markdown to the rendered HTML
+
 def create_connection(db_file: str) -> None:
     """ 
-    Creates a database connection to a SQLite database.
+    Sets the database file and opens the database connection for the current thread.
+    Every thread gets its own connection in WAL mode, so readers don't block each other or the writer.
     
     :param db_file: The file path of the database file.
     :return: None.
     """
-    global conn
+    global db_file_path
+    db_file_path = db_file
+    get_connection()
+
+def get_connection() -> Optional[sqlite3.Connection]:
+    """
+    Returns the database connection of the current thread and opens it if needed.
+
+    Connections left open by threads that have finished since are closed, so short-lived worker threads don't leak them.
+
+    :return: The database connection or None if it could not be opened.
+    """
+    conn : Optional[sqlite3.Connection] = getattr(conn_local, "conn", None)
+    if conn is None:
+        try:
+            conn = sqlite3.connect(db_file_path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+        except Error as e:
+            print(e)
+            return None
+        conn_local.conn = conn
+        with connections_lock:
+            for thread in [thread for thread in connections if not thread.is_alive()]:
+                connections.pop(thread).close()
+            connections[threading.current_thread()] = conn
+    return conn
+
+def close_connection() -> None:
+    """
+    Closes the database connection of the current thread, the next query opens a new one.
+
+    :return: None.
+    """
+    conn : Optional[sqlite3.Connection] = getattr(conn_local, "conn", None)
+    if conn is None:
+        return
+    conn_local.conn = None
+    with connections_lock:
+        connections.pop(threading.current_thread(), None)
+    conn.close()
+
+def close_connections() -> None:
+    """
+    Closes the database connections of all threads.
+
+    :return: None.
+    """
+    with connections_lock:
+        for conn in connections.values():
+            conn.close()
+        connections.clear()
+
+def run_and_close_connection(function: Callable, *args, **kwargs):
+    """
+    Runs a function on a worker thread that does not live as long as the app and closes the database connection it opened.
+
+    :param function: The function to run.
+    :param args: The positional arguments of the function.
+    :param kwargs: The keyword arguments of the function.
+    :return: The result of the function.
+    """
     try:
-        conn = sqlite3.connect(db_file, check_same_thread=False)
-    except Error as e:
-        print(e)
+        return function(*args, **kwargs)
+    finally:
+        close_connection()
 
 def execute_sql(sql: str, *data) -> list:
     """
     Executes an SQL statement and returns the result as a list of rows.
+    Reads run concurrently on the connection of the calling thread while writes are serialized.
 
     :param sql: The SQL statement.
     :param data: Any data to be passed to the SQL statement.
     :return: A list of rows.
     """
     try:
-        with conn_lock:
+        conn = get_connection()
+        if sql.lstrip().upper().startswith("SELECT"):
+            with conn:
+                return conn.execute(sql, data).fetchall()
+        with write_lock:
             with conn:
                 cur = conn.cursor()
                 cur.execute(sql, data)
@@ -128,6 +407,42 @@ def execute_sql(sql: str, *data) -> list:
         print("Data:", data)
         print("Error:", e)
 
+def execute_many_sql(sql: str, rows: List[tuple]) -> bool:
+    """
+    Executes an SQL statement once for every row of data in a single transaction.
+
+    :param sql: The SQL statement.
+    :param rows: The data for every execution of the SQL statement.
+    :return: Whether the transaction was committed.
+    """
+    return execute_transaction([(sql, rows)])
+
+def execute_transaction(statements: List[Tuple[str, Optional[List[tuple]]]]) -> bool:
+    """
+    Executes several SQL statements, each once for every row of its data, in a single transaction.
+    The transaction is started explicitly, so it also covers statements that change the schema.
+
+    :param statements: A list of tuples containing an SQL statement and the data for every execution of it, or None to execute the statement once without data.
+    :return: Whether the transaction was committed.
+    """
+    sql, rows = None, []
+    try:
+        conn = get_connection()
+        with write_lock:
+            with conn:
+                conn.execute("BEGIN")
+                for sql, rows in statements:
+                    if rows is None:
+                        conn.execute(sql)
+                    else:
+                        conn.executemany(sql, rows)
+        return True
+    except Error as e:
+        print("Query:", sql)
+        print("Rows:", len(rows or []))
+        print("Error:", e)
+        return False
+
 def setup_db() -> None:
     """
     Creates all tables we need if they do not already exist.
@@ -146,9 +461,65 @@ def setup_db() -> None:
         model_type text NOT NULL
     );
     """
+    hashes_table = """
+    CREATE TABLE IF NOT EXISTS model_hashes (
+        path text PRIMARY KEY,
+        size integer NOT NULL,
+        mtime real NOT NULL,
+        sha256 text NOT NULL
+    );
+    """
+    civitai_cache_table = """
+    CREATE TABLE IF NOT EXISTS civitai_cache (
+        key text PRIMARY KEY,
+        status integer NOT NULL,
+        body text,
+        etag text,
+        last_modified text,
+        fetched_at real NOT NULL
+    );
+    """
     execute_sql(meta_table)
     execute_sql(notes_table)
+    execute_sql(hashes_table)
+    sync_jobs_table = """
+    CREATE TABLE IF NOT EXISTS sync_jobs (
+        id integer PRIMARY KEY AUTOINCREMENT,
+        options text NOT NULL,
+        status text NOT NULL,
+        created_at real NOT NULL
+    );
+    """
+    sync_job_models_table = """
+    CREATE TABLE IF NOT EXISTS sync_job_models (
+        job_id integer NOT NULL REFERENCES sync_jobs(id) ON DELETE CASCADE,
+        model_type integer NOT NULL,
+        model_name text NOT NULL,
+        preview_path text,
+        state text NOT NULL,
+        attempts integer NOT NULL DEFAULT 0,
+        retry_after real,
+        description_result text,
+        preview_result text,
+        PRIMARY KEY (job_id, model_type, model_name)
+    );
+    """
+    note_files_table = """
+    CREATE TABLE IF NOT EXISTS note_files (
+        path text PRIMARY KEY,
+        model_hash text NOT NULL,
+        size integer NOT NULL,
+        mtime real NOT NULL,
+        note_hash text NOT NULL,
+        synced_at real NOT NULL
+    );
+    """
+    execute_sql(civitai_cache_table)
+    execute_sql(sync_jobs_table)
+    execute_sql(sync_job_models_table)
+    execute_sql(note_files_table)
     upgrade_db()
+    setup_search_index()
 
 def upgrade_db() -> None:
     """
@@ -163,27 +534,236 @@ def upgrade_db() -> None:
     REPLACE INTO meta(version) VALUES(?);
     """
     rows = execute_sql(get_version)
-    version = rows[0][0] if rows != [] else "1"
+    version = rows[0][0] if rows != [] else None
+    if version is None:
+        # New databases never stored a version, so look at the columns of the notes table instead
+        columns = [row[1] for row in execute_sql("PRAGMA table_info(notes);") or []]
+        version = "2" if "model_type" in columns else "1"
+    # Every step runs in a single transaction, so a crash leaves the database at the previous version and the step runs again on the next start
     if version == "1":
         upgrade_note_table = f"""
         ALTER TABLE notes ADD COLUMN model_type text NOT NULL DEFAULT '{ModelType.Checkpoint.value}';
         """
-        execute_sql(upgrade_note_table)
-        execute_sql(set_version, 2)
+        if execute_transaction([(upgrade_note_table, None), (set_version, [(2,)])]):
+            version = "2"
+    if version == "2":
+        rows = execute_sql("SELECT model_hash, note FROM notes") or []
+        if execute_transaction([
+            ("ALTER TABLE notes ADD COLUMN note_hash text;", None),
+            ("ALTER TABLE notes ADD COLUMN updated_at real NOT NULL DEFAULT 0;", None),
+            ("UPDATE notes SET note_hash = ? WHERE model_hash = ?;", [(get_content_hash(note), model_hash) for model_hash, note in rows]),
+            (set_version, [(3,)]),
+        ]):
+            version = "3"
+    if version == "3":
+        if execute_transaction([(f"ALTER TABLE notes ADD COLUMN format integer NOT NULL DEFAULT {NoteFormat.plain.value};", None), (set_version, [(4,)])]):
+            version = "4"
+    if version == "4":
+        # SQLite can't change the type of a column, so the notes are copied into a new table. The rowids are kept because the search index refers to them.
+        now = time.time()
+        new_note_table = f"""
+        CREATE TABLE notes_v5 (
+            model_hash text PRIMARY KEY,
+            note text NOT NULL,
+            model_type integer NOT NULL,
+            model_name text,
+            note_hash text,
+            format integer NOT NULL DEFAULT {NoteFormat.plain.value},
+            created_at real NOT NULL,
+            updated_at real NOT NULL
+        );
+        """
+        copy_notes = f"""
+        INSERT INTO notes_v5(rowid, model_hash, note, model_type, model_name, note_hash, format, created_at, updated_at)
+        SELECT rowid, model_hash, note, CAST(model_type AS integer), NULL, note_hash, format,
+            CASE WHEN updated_at > 0 THEN updated_at ELSE {now} END, CASE WHEN updated_at > 0 THEN updated_at ELSE {now} END
+        FROM notes;
+        """
+        if execute_transaction([
+            (new_note_table, None),
+            (copy_notes, None),
+            ("DROP TABLE notes;", None),
+            ("ALTER TABLE notes_v5 RENAME TO notes;", None),
+            ("CREATE INDEX notes_type_name ON notes(model_type, model_name);", None),
+            ("CREATE INDEX notes_updated_at ON notes(updated_at);", None),
+            (set_version, [(5,)]),
+        ]):
+            version = "5"
+
+def setup_search_index() -> None:
+    """
+    Creates the full-text search index of the notes and fills it with all saved notes when it was just created.
+    The index is kept up to date by `set_notes`. If the SQLite library was built without FTS5 then searches fall back to a slower substring search.
 
-def set_note(model_type : ModelType, model_hash: str, note: str) -> None:
+    :return: None.
+    """
+    global search_index_available
+    index_exists = execute_sql("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'")
+    if not index_exists:
+        search_table = """
+        CREATE VIRTUAL TABLE notes_fts USING fts5(
+            model_hash UNINDEXED,
+            note,
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+        """
+        if execute_sql(search_table) is None:
+            print("Model Notes: SQLite has no FTS5 support, searching notes will be slower")
+            search_index_available = False
+            return
+        fill_search_index = """
+        INSERT INTO notes_fts(rowid, model_hash, note) VALUES(?, ?, ?);
+        """
+        rows = execute_sql("SELECT rowid, model_hash, note, format FROM notes WHERE note != ''") or []
+        execute_many_sql(fill_search_index, [(rowid, model_hash, decode_note(note, note_format)) for rowid, model_hash, note, note_format in rows])
+    search_index_available = True
+
+def encode_note(note: str) -> Tuple[Union[str, bytes], NoteFormat]:
+    """
+    Compresses a note for the database if compression is enabled and the note is larger than the configured threshold.
+
+    :param note: The note.
+    :return: A tuple containing the value stored in the database and its format.
+    """
+    if not shared.opts.model_note_compression:
+        return note, NoteFormat.plain
+    data = note.encode("utf-8")
+    if len(data) < int(shared.opts.model_note_compression_threshold):
+        return note, NoteFormat.plain
+    compressed = zlib.compress(data, 6)
+    if len(compressed) >= len(data):
+        return note, NoteFormat.plain # Not worth decompressing on every read
+    return compressed, NoteFormat.zlib
+
+def decode_note(value: Union[str, bytes], note_format: int) -> str:
+    """
+    Restores a note read from the database.
+
+    :param value: The value stored in the database.
+    :param note_format: The value of the `NoteFormat` the note was stored in.
+    :return: The note.
+    """
+    if note_format == NoteFormat.zlib.value:
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+def set_note(model_type : ModelType, model_hash: str, note: str, model_name: Optional[str] = None) -> None:
     """
     Save a note in the database for the given model.
     
     :param model_type: The type of the model.
     :param model_hash: The full sha256 hash of the model.
     :param note: The note that should be saved.
+    :param model_name: The name of the model or None to keep the saved name.
     :return: None.
     """
-    sql = """
-    REPLACE INTO notes(model_hash, note, model_type) VALUES(?, ?, ?);
+    set_notes([(model_type, model_hash, note)], {model_hash: model_name} if model_name else None)
+
+scheduled_notes : Dict[str, Tuple[ModelType, str, Optional[str]]] = {} # Autosaved notes and the names of their models that are not written yet, by the sha256 of their model
+scheduled_notes_lock = threading.Lock()
+scheduled_notes_timer : Optional[threading.Timer] = None
+scheduled_notes_failures = 0 # Failed saves in a row, every failure doubles the time until the next try
+scheduled_notes_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model_notes_autosave") # Saves on one thread, so timers don't open database connections
+
+def schedule_note(model_type : ModelType, model_hash: str, note: str, model_name: Optional[str] = None) -> None:
     """
-    execute_sql(sql, model_hash, note, model_type.value)
+    Saves a note once it was not edited for the configured autosave delay, so typing does not write to the database on every keystroke.
+    Edits to the same note replace each other and all notes due at the same time are saved in a single transaction.
+    
+    :param model_type: The type of the model.
+    :param model_hash: The full sha256 hash of the model.
+    :param note: The note that should be saved.
+    :param model_name: The name of the model or None to keep the saved name.
+    :return: None.
+    """
+    with scheduled_notes_lock:
+        scheduled_notes[model_hash] = (model_type, note, model_name)
+        start_scheduled_notes_timer(float(shared.opts.model_note_autosave_delay))
+    clear_all_notes_snapshot() # The snapshot includes the scheduled notes
+
+def start_scheduled_notes_timer(delay: float) -> None:
+    """
+    Saves the scheduled notes after the given time, replacing an earlier timer. Must be called while holding `scheduled_notes_lock`.
+
+    :param delay: The time in seconds until the notes are saved.
+    :return: None.
+    """
+    global scheduled_notes_timer
+    if scheduled_notes_timer is not None:
+        scheduled_notes_timer.cancel()
+    scheduled_notes_timer = threading.Timer(delay, lambda: scheduled_notes_executor.submit(flush_scheduled_notes))
+    scheduled_notes_timer.daemon = True
+    scheduled_notes_timer.start()
+
+def flush_scheduled_notes() -> None:
+    """
+    Saves all scheduled notes right away.
+    If the notes could not be saved then they are kept and saved again later, waiting longer after every failure.
+    
+    :return: None.
+    """
+    global scheduled_notes_timer, scheduled_notes_failures
+    with scheduled_notes_lock:
+        if scheduled_notes_timer is not None:
+            scheduled_notes_timer.cancel()
+            scheduled_notes_timer = None
+        if not scheduled_notes:
+            return
+        notes = [(model_type, model_hash, note) for model_hash, (model_type, note, _) in scheduled_notes.items()]
+        model_names = {model_hash: model_name for model_hash, (_, _, model_name) in scheduled_notes.items() if model_name}
+        if set_notes(notes, model_names):
+            scheduled_notes.clear()
+            scheduled_notes_failures = 0
+            return
+        scheduled_notes_failures += 1
+        delay = min(float(shared.opts.model_note_autosave_delay) * 2 ** scheduled_notes_failures, 300)
+        print(f"Failed to autosave {len(notes)} notes, trying again in {delay:.1f} seconds")
+        start_scheduled_notes_timer(delay)
+
+def set_notes(notes: List[Tuple[ModelType, str, str]], model_names: Optional[Dict[str, str]] = None) -> bool:
+    """
+    Save several notes in the database within a single transaction.
+    Large notes are compressed if enabled in the settings, see `encode_note`.
+    
+    :param notes: A list of tuples containing the type of the model, the full sha256 hash of the model and the note that should be saved.
+    :param model_names: Maps the full sha256 hash of models to their names, see `get_canonical_model_name`. The saved name is kept for models without a name.
+    :return: Whether the notes were saved.
+    """
+    # Only notes that really changed get a new modification time, so incremental exports can skip the others
+    sql = """
+    INSERT INTO notes(model_hash, note, format, model_type, model_name, note_hash, created_at, updated_at) VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(model_hash) DO UPDATE SET note = excluded.note, format = excluded.format, model_type = excluded.model_type, model_name = COALESCE(excluded.model_name, notes.model_name), note_hash = excluded.note_hash,
+        updated_at = CASE WHEN notes.note_hash IS NOT excluded.note_hash THEN excluded.updated_at ELSE notes.updated_at END
+    WHERE notes.note_hash IS NOT excluded.note_hash OR notes.model_type != excluded.model_type OR notes.model_name IS NOT COALESCE(excluded.model_name, notes.model_name);
+    """
+    now = time.time()
+    model_names = model_names or {}
+    rows = []
+    for model_type, model_hash, note in notes:
+        value, note_format = encode_note(note)
+        model_name = model_names.get(model_hash)
+        rows.append((model_hash, value, note_format.value, model_type.value, get_canonical_model_name(model_type, model_name) if model_name else None, get_content_hash(note), now, now))
+    statements = [(sql, rows)]
+    if search_index_available:
+        # The search index shares the rowid with the notes table, which is kept when a note is updated
+        delete_indexed = """
+        DELETE FROM notes_fts WHERE rowid = (SELECT rowid FROM notes WHERE model_hash = ?);
+        """
+        insert_indexed = """
+        INSERT INTO notes_fts(rowid, model_hash, note) SELECT rowid, model_hash, ? FROM notes WHERE model_hash = ?;
+        """
+        latest_notes = {model_hash: note for _, model_hash, note in notes} # The index is filled with the plain note, even if it is stored compressed
+        statements.append((delete_indexed, [(model_hash,) for model_hash in latest_notes]))
+        statements.append((insert_indexed, [(note, model_hash) for model_hash, note in latest_notes.items() if note != ""]))
+    if not execute_transaction(statements):
+        return False
+    clear_all_notes_snapshot()
+    for model_type, model_hash, note in notes:
+        previous_note : Optional[str] = note_cache.get(model_hash)
+        if previous_note is not None and previous_note != note:
+            html_cache.pop(get_content_hash(previous_note))
+        note_cache.set(model_hash, note)
+    return True
 
 def get_note(model_hash: str) -> str:
     """
@@ -192,55 +772,428 @@ def get_note(model_hash: str) -> str:
     :param model_hash: The full sha256 hash of the model.
     :return: The saved note for the saved model or an empty string.
     """
+    scheduled = scheduled_notes.get(model_hash)
+    if scheduled is not None:
+        return scheduled[1]
+    note : Optional[str] = note_cache.get(model_hash)
+    if note is not None:
+        return note
+    generation = note_cache.generation
     sql = """
-    SELECT note FROM notes WHERE model_hash = ?
+    SELECT note, format FROM notes WHERE model_hash = ?
     """
     rows = execute_sql(sql, model_hash)
-    note : str = rows[0][0] if rows != [] else ""
+    note = decode_note(*rows[0]) if rows else ""
+    note_cache.fill(model_hash, note, generation)
     return note
 
+def get_notes(model_hashes: List[str]) -> Dict[str, str]:
+    """
+    Retrieve the saved notes for several models, querying the database only for notes that are not cached.
+    
+    :param model_hashes: The full sha256 hashes of the models.
+    :return: A dictionary mapping every given hash to its saved note or an empty string.
+    """
+    notes : Dict[str, str] = {}
+    missing : List[str] = []
+    for model_hash in dict.fromkeys(model_hashes):
+        scheduled = scheduled_notes.get(model_hash)
+        note : Optional[str] = scheduled[1] if scheduled is not None else note_cache.get(model_hash)
+        if note is None:
+            missing.append(model_hash)
+        else:
+            notes[model_hash] = note
+    chunk_size = 500 # Stay below the maximum number of variables of a SQLite statement
+    for i in range(0, len(missing), chunk_size):
+        chunk = missing[i:i + chunk_size]
+        generation = note_cache.generation
+        sql = f"""
+        SELECT model_hash, note, format FROM notes WHERE model_hash IN ({", ".join("?" * len(chunk))})
+        """
+        found = {model_hash: decode_note(note, note_format) for model_hash, note, note_format in execute_sql(sql, *chunk) or []}
+        for model_hash in chunk:
+            notes[model_hash] = found.get(model_hash, "")
+            note_cache.fill(model_hash, notes[model_hash], generation)
+    return notes
+
+def get_all_notes() -> Dict[str, str]:
+    """
+    Retrieve all saved notes with a single query, including the scheduled notes that are not written yet.
+    
+    :return: A dictionary mapping the full sha256 hash of every model with a note to its note.
+    """
+    # Copy the scheduled notes first, so a note that is written in the meantime is in the query or in the copy
+    with scheduled_notes_lock:
+        pending = {model_hash: note for model_hash, (_, note, _) in scheduled_notes.items()}
+    sql = """
+    SELECT model_hash, note, format FROM notes
+    """
+    rows = execute_sql(sql) or []
+    notes = {model_hash: decode_note(note, note_format) for model_hash, note, note_format in rows}
+    notes.update(pending)
+    return notes
+
+all_notes_snapshot : Optional[Dict[str, str]] = None # All notes decoded once and shared by the extra network pages until a note changes
+all_notes_snapshot_generation = 0 # Increased whenever the snapshot is cleared
+all_notes_snapshot_lock = threading.Lock()
+
+def get_all_notes_snapshot() -> Dict[str, str]:
+    """
+    Retrieve all saved notes, reading and decoding them only once until a note changes.
+    The extra network pages are rendered one after another on every refresh, so they all share the same notes.
+
+    :return: A dictionary mapping the full sha256 hash of every model with a note to its note. It must not be modified.
+    """
+    global all_notes_snapshot
+    with all_notes_snapshot_lock:
+        if all_notes_snapshot is not None:
+            return all_notes_snapshot
+        generation = all_notes_snapshot_generation
+    # The notes are read without holding the lock, saving a note while they are read only prevents keeping them
+    notes = get_all_notes()
+    with all_notes_snapshot_lock:
+        if all_notes_snapshot_generation == generation:
+            all_notes_snapshot = notes
+    return notes
+
+def clear_all_notes_snapshot() -> None:
+    """
+    Makes the next call of `get_all_notes_snapshot` read the notes again.
+
+    :return: None.
+    """
+    global all_notes_snapshot, all_notes_snapshot_generation
+    with all_notes_snapshot_lock:
+        all_notes_snapshot = None
+        all_notes_snapshot_generation += 1
+
+def get_notes_by_type(model_type: ModelType, limit: int = 100, offset: int = 0) -> List[Tuple[str, Optional[str], float]]:
+    """
+    Lists the notes of a model type ordered by model name, using the index on the model type and name.
+
+    :param model_type: The type of the models.
+    :param limit: The maximum number of notes.
+    :param offset: The number of notes to skip.
+    :return: A list of tuples containing the full sha256 hash of the model, the name of the model if known and the time the note was last changed.
+    """
+    sql = """
+    SELECT model_hash, model_name, updated_at FROM notes
+    WHERE model_type = ? AND note != ''
+    ORDER BY model_name LIMIT ? OFFSET ?
+    """
+    return [tuple(row) for row in execute_sql(sql, model_type.value, limit, offset) or []]
+
+def get_recent_notes(limit: int = 20, model_type: Optional[ModelType] = None) -> List[Tuple[str, ModelType, Optional[str], float]]:
+    """
+    Lists the most recently changed notes, using the index on the modification time.
+
+    :param limit: The maximum number of notes.
+    :param model_type: Only list notes of this model type or None for all types.
+    :return: A list of tuples containing the full sha256 hash of the model, its type, its name if known and the time the note was last changed, newest first.
+    """
+    type_filter = "AND model_type = ?" if model_type is not None else ""
+    type_data = (model_type.value,) if model_type is not None else ()
+    sql = f"""
+    SELECT model_hash, model_type, model_name, updated_at FROM notes
+    WHERE note != '' {type_filter}
+    ORDER BY updated_at DESC LIMIT ?
+    """
+    rows = execute_sql(sql, *type_data, limit) or []
+    return [(model_hash, ModelType(int(model_type_value)), model_name, updated_at) for model_hash, model_type_value, model_name, updated_at in rows]
+
+def backfill_model_names() -> None:
+    """
+    Saves the model names of notes that were saved without one, for example before names were stored.
+    Only the hashes of the hash index and of the checkpoints are used and no model file is read, so notes of deleted models only cost a lookup in memory on every start.
+
+    :return: None.
+    """
+    missing = {model_hash for model_hash, in execute_sql("SELECT model_hash FROM notes WHERE model_name IS NULL") or []}
+    if not missing:
+        return
+    with hash_index_lock:
+        indexed_paths = {path: sha256 for path, (_, _, sha256) in hash_index.items() if sha256 in missing}
+    model_names : Dict[str, str] = {}
+    for checkpoint_info in sd_models.checkpoints_list.values():
+        sha256 = checkpoint_info.sha256 if checkpoint_info.sha256 in missing else indexed_paths.get(checkpoint_info.filename)
+        if sha256 is not None:
+            model_names.setdefault(sha256, checkpoint_info.name_for_extra)
+    if indexed_paths:
+        for info in model_type_infos.values():
+            if info.model_type == ModelType.Checkpoint:
+                continue
+            for name in info.list_models():
+                sha256 = indexed_paths.get(info.get_file(name)[0])
+                if sha256 is not None:
+                    model_names.setdefault(sha256, name)
+    if model_names:
+        execute_many_sql("UPDATE notes SET model_name = ? WHERE model_hash = ? AND model_name IS NULL;", [(name, model_hash) for model_hash, name in model_names.items()])
+
+def build_search_query(query: str) -> str:
+    """
+    Turns the text of a search box into a FTS5 query that matches notes containing all words, the last word also as a prefix.
+
+    :param query: The text the user searched for.
+    :return: The FTS5 query or an empty string if there is nothing to search for.
+    """
+    words = query.split()
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+def search_notes(query: str, limit: int = 20, model_type: Optional[ModelType] = None) -> List[Tuple[str, ModelType, str]]:
+    """
+    Searches all notes for the given words, the best matches first.
+
+    :param query: The words to search for.
+    :param limit: The maximum number of results.
+    :param model_type: Only return notes of this model type or None for all types.
+    :return: A list of tuples containing the full sha256 hash of the model, the model type and a snippet of the note as HTML with the matching words marked.
+    """
+    start, end = "\x02", "\x03" # Placeholders for the marks, so the snippet can be escaped
+    type_filter = "AND notes.model_type = ?" if model_type is not None else ""
+    type_data = (model_type.value,) if model_type is not None else ()
+    if search_index_available:
+        fts_query = build_search_query(query)
+        if fts_query == "":
+            return []
+        sql = f"""
+        SELECT notes.model_hash, notes.model_type, snippet(notes_fts, 1, ?, ?, '…', 16) FROM notes_fts
+        JOIN notes ON notes.rowid = notes_fts.rowid
+        WHERE notes_fts MATCH ? {type_filter}
+        ORDER BY rank LIMIT ?
+        """
+        rows = execute_sql(sql, start, end, fts_query, *type_data, limit) or []
+    else:
+        words = query.split()
+        if not words:
+            return []
+        # Compressed notes can't be searched without the index
+        sql = f"""
+        SELECT model_hash, model_type, substr(note, 1, 200) FROM notes
+        WHERE format = {NoteFormat.plain.value} AND {" AND ".join("note LIKE ?" for _ in words)} {type_filter}
+        LIMIT ?
+        """
+        rows = execute_sql(sql, *[f"%{word}%" for word in words], *type_data, limit) or []
+    results = []
+    for model_hash, model_type_value, snippet in rows:
+        snippet = html.escape(snippet).replace(start, "<mark>").replace(end, "</mark>")
+        results.append((model_hash, ModelType(int(model_type_value)), snippet))
+    return results
+
+def search_note_hashes(query: str, model_type: Optional[ModelType] = None) -> List[str]:
+    """
+    Searches all notes for the given words and returns every match, without building snippets.
+
+    :param query: The words to search for.
+    :param model_type: Only return notes of this model type or None for all types.
+    :return: The full sha256 hashes of all models with a matching note, the best matches first.
+    """
+    type_filter = "AND notes.model_type = ?" if model_type is not None else ""
+    type_data = (model_type.value,) if model_type is not None else ()
+    if search_index_available:
+        fts_query = build_search_query(query)
+        if fts_query == "":
+            return []
+        sql = f"""
+        SELECT notes.model_hash FROM notes_fts
+        JOIN notes ON notes.rowid = notes_fts.rowid
+        WHERE notes_fts MATCH ? {type_filter}
+        ORDER BY rank
+        """
+        rows = execute_sql(sql, fts_query, *type_data) or []
+    else:
+        words = query.split()
+        if not words:
+            return []
+        # Compressed notes can't be searched without the index
+        sql = f"""
+        SELECT model_hash FROM notes
+        WHERE format = {NoteFormat.plain.value} AND {" AND ".join("note LIKE ?" for _ in words)} {type_filter}
+        """
+        rows = execute_sql(sql, *[f"%{word}%" for word in words], *type_data) or []
+    return [model_hash for model_hash, in rows]
+
+def get_note_hashes() -> Dict[str, str]:
+    """
+    Retrieve the content hashes of all saved notes that are not empty.
+
+    :return: A dictionary mapping the full sha256 hash of every model with a note to the sha256 hash of its note.
+    """
+    sql = """
+    SELECT model_hash, note_hash FROM notes WHERE note != ''
+    """
+    rows = execute_sql(sql) or []
+    return {model_hash: note_hash for model_hash, note_hash in rows}
+
+def get_note_files() -> Dict[str, Tuple[int, float, str]]:
+    """
+    Retrieve all note files that were written or read by an import or export.
+
+    :return: A dictionary mapping the path of every file to its size, modification time and the content hash of the note it was synced with.
+    """
+    sql = """
+    SELECT path, size, mtime, note_hash FROM note_files
+    """
+    rows = execute_sql(sql) or []
+    return {path: (size, mtime, note_hash) for path, size, mtime, note_hash in rows}
+
+def set_note_files(files: List[Tuple[str, str, str]]) -> bool:
+    """
+    Remembers the state of note files after they were written or read, so unchanged files can be skipped by the next import or export.
+
+    :param files: A list of tuples containing the path of the file, the full sha256 hash of the model and the content hash of the note the file was synced with.
+    :return: Whether the files were saved.
+    """
+    sql = """
+    REPLACE INTO note_files(path, model_hash, size, mtime, note_hash, synced_at) VALUES(?, ?, ?, ?, ?, ?);
+    """
+    now = time.time()
+    rows = []
+    for path, model_hash, note_hash in files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        rows.append((str(path), model_hash, stat.st_size, stat.st_mtime, note_hash, now))
+    return execute_many_sql(sql, rows)
+
+def is_note_file_unchanged(path: str, note_hash: Optional[str], note_files: Dict[str, Tuple[int, float, str]]) -> bool:
+    """
+    Checks if a note file is still in the state of the last import or export and was synced with the given note.
+
+    :param path: The path of the file.
+    :param note_hash: The content hash of the current note.
+    :param note_files: The known note files, see `get_note_files`.
+    :return: True if neither the file nor the note changed since the last sync.
+    """
+    synced = note_files.get(str(path))
+    if synced is None or note_hash is None or synced[2] != note_hash:
+        return False
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_size == synced[0] and stat.st_mtime == synced[1]
+
+def warm_note_cache() -> None:
+    """
+    Applies the configured cache sizes and fills the note cache with the saved notes.
+    
+    :return: None.
+    """
+    note_cache.resize(int(shared.opts.model_note_cache_size))
+    html_cache.resize(int(shared.opts.model_note_html_cache_size))
+    generation = note_cache.generation
+    for model_hash, note in list(get_all_notes().items())[:note_cache.max_size]:
+        if not note_cache.fill(model_hash, note, generation):
+            break
+
+enum_aliases : Dict[type, Dict[str, Enum]] = {} # Maps the known spellings of every Enum member to the member
+enum_match_cache = LRUCache(max_size=256) # Remembers the closest members of unknown spellings
+
+def normalize_enum_alias(string: str) -> str:
+    """
+    Brings a spelling of an Enum member into the form used by the alias table.
+
+    :param string: The spelling.
+    :return: The spelling in lowercase with spaces and hyphens replaced by underscores.
+    """
+    return string.strip().lower().replace(" ", "_").replace("-", "_")
+
+def add_enum_alias(alias: str, member: Enum) -> None:
+    """
+    Adds a spelling of an Enum member, its form without underscores and its plural to the alias table.
+
+    :param alias: The spelling of the member.
+    :param member: The Enum member.
+    :return: None.
+    """
+    aliases = enum_aliases.setdefault(type(member), {})
+    alias = normalize_enum_alias(alias)
+    plural = alias[:-1] if alias.endswith("s") else alias + "s"
+    for spelling in (alias, alias.replace("_", ""), plural):
+        if spelling != "":
+            aliases.setdefault(spelling, member)
+    enum_match_cache.clear()
+
+def get_enum_aliases(enum_type) -> Dict[str, Enum]:
+    """
+    Returns the alias table of an Enum, adding the names of all members the first time.
+
+    :param enum_type: The Enum.
+    :return: A dictionary mapping the known spellings to the members.
+    """
+    if enum_type not in enum_aliases:
+        for member in enum_type:
+            add_enum_alias(member.name, member)
+    return enum_aliases[enum_type]
+
 # Helper function to calculate Levenshtein distance between two strings
-def levenshtein_distance(s1: str, s2: str) -> int:
+def levenshtein_distance(s1: str, s2: str, max_distance: Optional[int] = None) -> int:
     """
     Calculates the Levenshtein distance between two strings.
+    Common prefixes and suffixes are skipped and the calculation stops early once the distance exceeds `max_distance`.
 
     :param s1: The first string to compare.
     :param s2: The second string to compare.
+    :param max_distance: Stop as soon as the distance is known to be larger than this, in which case any value above it is returned.
     :return: An integer representing the number of edits required to transform s1 into s2.
     """
+    if s1 == s2:
+        return 0
     if len(s1) > len(s2):
         s1, s2 = s2, s1
-    distances = range(len(s1) + 1)
+    start = 0
+    while start < len(s1) and s1[start] == s2[start]:
+        start += 1
+    end1, end2 = len(s1), len(s2)
+    while end1 > start and s1[end1 - 1] == s2[end2 - 1]:
+        end1 -= 1
+        end2 -= 1
+    s1, s2 = s1[start:end1], s2[start:end2]
+    if not s1:
+        return len(s2)
+    if max_distance is not None and len(s2) - len(s1) > max_distance:
+        return len(s2) - len(s1)
+    distances = list(range(len(s1) + 1))
     for i2, c2 in enumerate(s2):
-        distances_ = [i2+1]
+        previous_diagonal, distances[0] = distances[0], i2 + 1
         for i1, c1 in enumerate(s1):
-            if c1 == c2:
-                distances_.append(distances[i1])
-            else:
-                distances_.append(1 + min((distances[i1], distances[i1 + 1], distances_[-1])))
-        distances = distances_
+            substitution = previous_diagonal if c1 == c2 else previous_diagonal + 1
+            previous_diagonal = distances[i1 + 1]
+            distances[i1 + 1] = min(substitution, previous_diagonal + 1, distances[i1] + 1)
+        if max_distance is not None and min(distances) > max_distance:
+            return min(distances)
     return distances[-1]
 
 def match_enum(string, enum_type):
     """
-    Matches a string to the given Enum by finding the closest match based on Levenshtein distance.
+    Matches a string to the given Enum.
+    Known spellings like member names, plurals and the tab names of the webui are looked up directly, any other string is matched to the closest alias based on Levenshtein distance.
 
     :param string: The string to match.
     :return: A Enum value representing the closest match to the input string.
     """
-    # Convert input string to lowercase and remove spaces
-    string = string.lower().replace(" ", "_")
+    string = normalize_enum_alias(string)
+    aliases = get_enum_aliases(enum_type)
+    member = aliases.get(string)
+    if member is not None:
+        return member
 
     # Find the closest match to the input string
-    closest_match = None
-    closest_distance = float("inf")
-    for member in enum_type:
-        distance = levenshtein_distance(string, member.name.lower())
-        if distance < closest_distance:
+    cache_key = (enum_type, string)
+    closest_match = enum_match_cache.get(cache_key)
+    if closest_match is not None:
+        return closest_match
+    closest_distance = None
+    for alias, member in aliases.items():
+        distance = levenshtein_distance(string, alias, closest_distance)
+        if closest_distance is None or distance < closest_distance:
             closest_distance = distance
             closest_match = member
-
-    # Return the closest match
+    enum_match_cache.set(cache_key, closest_match)
     return closest_match
 
 def convert_markdown_to_html(markdown: str) -> str:
@@ -250,9 +1203,21 @@ def convert_markdown_to_html(markdown: str) -> str:
     :param markdown: The markdown to convert.
     :return: The converted HTML.
     """
-    markdown = inspect.cleandoc(markdown)
-    markdown = md_renderer.render(markdown)
-    return markdown
+    content_hash = get_content_hash(markdown)
+    html : Optional[str] = html_cache.get(content_hash)
+    if html is None:
+        html = md_renderer.render(inspect.cleandoc(markdown))
+        html_cache.set(content_hash, html)
+    return html
+
+def get_content_hash(text: str) -> str:
+    """
+    Returns the sha256 of the given text.
+
+    :param text: The text to hash.
+    :return: The hex digest of the sha256 of the text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 def api_get_note_by_hash(hash : str, markdown : bool = False) -> JSONResponse:
     """
@@ -264,18 +1229,30 @@ def api_get_note_by_hash(hash : str, markdown : bool = False) -> JSONResponse:
     note = get_note(hash)
     return JSONResponse({"note": convert_markdown_to_html(note) if markdown else note})
 
-def api_get_note_by_name(type : str, name : str, markdown : bool = False) -> JSONResponse:
+def api_get_note_by_name(type : str, name : str, markdown : bool = False, version : Optional[str] = None) -> JSONResponse:
     """
     Get the note from the given model.
     
     :param type: The type of the model. Any format of string is accepted and will be converted to the correct format.
     :param name: The name of the model.
-    :return: JSONResponse containing the "note".
+    :param version: The "version" of the note the caller already has, the note is only sent again if it changed.
+    :return: JSONResponse containing the "note", its "version", whether it is the same as the given version ("unchanged") and whether the model is still being hashed ("pending"), a 404 response if the model does not exist or a 500 response if it could not be hashed.
     """
     real_model_type = match_enum(type, ModelType)
-    sha256 = get_model_sha256(real_model_type, name)
+    if get_model_file(real_model_type, name)[0] is None:
+        return JSONResponse({"note": "", "pending": False, "error": "Model not found"}, status_code=404)
+    sha256 = get_model_sha256(real_model_type, name, blocking=False)
+    if sha256 is None and is_hash_pending(real_model_type, name):
+        return JSONResponse({"note": "", "pending": True})
+    if sha256 is None:
+        sha256 = get_model_sha256(real_model_type, name, blocking=False) # The hash may have finished in the meantime
+    if sha256 is None:
+        return JSONResponse({"note": "", "pending": False, "error": "The model could not be hashed"}, status_code=500)
     note = get_note(sha256)
-    return JSONResponse({"note": convert_markdown_to_html(note) if markdown else note})
+    note_version = get_content_hash(note)
+    if note_version == version:
+        return JSONResponse({"note": "", "version": note_version, "unchanged": True, "pending": False})
+    return JSONResponse({"note": convert_markdown_to_html(note) if markdown else note, "version": note_version, "unchanged": False, "pending": False})
 
 def api_set_note_by_hash(type : str, hash : str, note : str) -> JSONResponse:
     """
@@ -297,72 +1274,612 @@ def api_set_note_by_name(type : str, name : str, note : str) -> JSONResponse:
     :param type: The type of the model. Any format of string is accepted and will be converted to the correct format.
     :param name: The name of the model.
     :param note: The note that should be saved.
-    :return: JSONResponse containing the "note".
+    :return: JSONResponse containing whether the note was saved ("success") or a 404 response if the model does not exist.
     """
     real_model_type = match_enum(type, ModelType)
     sha256 = get_model_sha256(real_model_type, name)
-    set_note(model_hash=sha256, note=note, model_type=real_model_type)
+    if sha256 is None:
+        return JSONResponse({"success": False, "error": "Model not found"}, status_code=404)
+    set_note(model_hash=sha256, note=note, model_type=real_model_type, model_name=name)
     return JSONResponse({"success": True})
 
-def api_convert_text_to_html(text : str) -> JSONResponse:
+def api_convert_text_to_html(text : str) -> JSONResponse:
+    """
+    Converts the given text to HTML.
+    
+    :param text: The text that should be converted.
+    :return: JSONResponse containing the "html".
+    """
+    html = convert_markdown_to_html(text)
+    return JSONResponse({"html": html})
+
+class NoteReference(BaseModel):
+    """
+    Identifies a model either by its sha256 hash or by its type and name.
+    """
+    hash: Optional[str] = None
+    type: Optional[str] = None
+    name: Optional[str] = None
+
+class NoteUpdate(NoteReference):
+    """
+    A note that should be saved for the referenced model. The type is required when the model is referenced by its hash.
+    """
+    note: str
+
+def resolve_note_reference(reference : NoteReference, blocking : bool) -> Tuple[Optional[ModelType], Optional[str]]:
+    """
+    Resolves the model type and the sha256 hash of the referenced model.
+
+    :param reference: The reference to the model.
+    :param blocking: Whether to wait for the model to be hashed.
+    :return: A tuple containing the model type and the sha256 hash. Each of them is None if it could not be resolved.
+    """
+    model_type = match_enum(reference.type, ModelType) if reference.type else None
+    if reference.hash:
+        return model_type, reference.hash
+    if model_type is None or not reference.name:
+        return model_type, None
+    return model_type, get_model_sha256(model_type, reference.name, blocking=blocking)
+
+def api_get_notes(models : List[NoteReference], markdown : bool = False, include_html : bool = False) -> JSONResponse:
+    """
+    Get the notes of several models with a single request.
+    
+    :param models: The models referenced either by "hash" or by "type" and "name".
+    :param markdown: Whether to convert the notes to HTML.
+    :param include_html: Whether to add the note converted to HTML as "html" to every result, next to the unconverted note.
+    :return: JSONResponse containing the "results" in the same order as the given models, each with the "hash", "note", the "version" of the note and whether the model is still being hashed ("pending").
+    """
+    resolved = [resolve_note_reference(reference, blocking=False) for reference in models]
+    notes = get_notes([sha256 for model_type, sha256 in resolved if sha256 is not None])
+    results = []
+    for reference, (model_type, sha256) in zip(models, resolved):
+        note = notes.get(sha256, "") if sha256 is not None else ""
+        result = {
+            "hash": sha256,
+            "type": reference.type,
+            "name": reference.name,
+            "note": convert_markdown_to_html(note) if markdown else note,
+            "version": get_content_hash(note),
+            "pending": sha256 is None and model_type is not None and bool(reference.name) and is_hash_pending(model_type, reference.name),
+        }
+        if include_html:
+            result["html"] = convert_markdown_to_html(note)
+        results.append(result)
+    return JSONResponse({"results": results})
+
+def api_set_notes(notes : List[NoteUpdate]) -> JSONResponse:
+    """
+    Sets the notes of several models within a single transaction.
+    
+    :param notes: The notes together with the models referenced either by "hash" and "type" or by "type" and "name".
+    :return: JSONResponse containing whether all notes were saved ("success") and the "results" in the same order as the given notes, each with the "hash", "success" and an "error" message if it failed.
+    """
+    results = []
+    rows = []
+    model_names = {}
+    for update in notes:
+        model_type, sha256 = resolve_note_reference(update, blocking=True)
+        if model_type is None:
+            results.append({"hash": sha256, "success": False, "error": "Missing model type"})
+        elif sha256 is None:
+            results.append({"hash": sha256, "success": False, "error": "Model not found"})
+        else:
+            rows.append((model_type, sha256, update.note))
+            if update.name:
+                model_names[sha256] = update.name
+            results.append({"hash": sha256, "success": True, "error": None})
+    if rows and not set_notes(rows, model_names):
+        for result in results:
+            if result["success"]:
+                result["success"] = False
+                result["error"] = "Failed to save notes"
+    return JSONResponse({"success": all(result["success"] for result in results), "results": results})
+
+def api_set_note(update : NoteUpdate) -> JSONResponse:
+    """
+    Sets the note for the given model. Unlike the other setters the note is sent in the JSON body, so notes of any length can be saved.
+    
+    :param update: The note together with the model referenced either by "hash" and "type" or by "type" and "name".
+    :return: JSONResponse containing whether the note was saved ("success"), the "version" of the saved note and an "error" message if it failed.
+    """
+    model_type, sha256 = resolve_note_reference(update, blocking=True)
+    if model_type is None:
+        return JSONResponse({"success": False, "error": "Missing model type"}, status_code=400)
+    if sha256 is None:
+        return JSONResponse({"success": False, "error": "Model not found"}, status_code=404)
+    set_note(model_hash=sha256, note=update.note, model_type=model_type, model_name=update.name)
+    return JSONResponse({"success": True, "version": get_content_hash(update.note), "error": None})
+
+class MarkdownText(BaseModel):
+    """
+    Markdown text that should be converted to HTML.
+    """
+    text: str
+
+def api_convert_markdown_to_html(markdown : MarkdownText) -> JSONResponse:
+    """
+    Converts the markdown sent in the JSON body to HTML.
+    
+    :param markdown: The markdown that should be converted.
+    :return: JSONResponse containing the "html" and the sha256 "hash" of the markdown, which is also sent as ETag so the result can be cached by its content.
+    """
+    content_hash = get_content_hash(markdown.text)
+    html = convert_markdown_to_html(markdown.text)
+    return JSONResponse({"html": html, "hash": content_hash}, headers={"ETag": f'"{content_hash}"'})
+
+class SyncJobRequest(BaseModel):
+    """
+    The options of a job that downloads descriptions from Civitai.
+    """
+    model_types: List[str]
+    overwrite: bool = False
+    dl_markdown: bool = True
+    dl_preview_image: bool = True
+    dl_preview_image_overwrite: bool = False
+
+def api_create_sync_job(request : SyncJobRequest) -> JSONResponse:
+    """
+    Starts a job that downloads the descriptions of all models of the given types from Civitai in the background.
+    
+    :param request: The options of the job. The model types must be any of "Textual Inversion", "Hypernetworks", "Checkpoints" or "LoRA".
+    :return: JSONResponse containing the "id" of the job.
+    """
+    unknown_model_types = [model_type for model_type in request.model_types if get_model_type_by_label(model_type) is None]
+    if unknown_model_types:
+        return JSONResponse({"error": f"Unknown model types: {', '.join(unknown_model_types)}"}, status_code=400)
+    job_id = create_sync_job(request.model_types, request.overwrite, request.dl_markdown, request.dl_preview_image, request.dl_preview_image_overwrite)
+    return JSONResponse({"id": job_id})
+
+def api_get_sync_jobs(limit : int = 20) -> JSONResponse:
+    """
+    Lists the most recent Civitai download jobs.
+    
+    :param limit: The maximum number of jobs.
+    :return: JSONResponse containing the "jobs", newest first.
+    """
+    return JSONResponse({"jobs": get_sync_jobs(limit)})
+
+def api_get_sync_job(job_id : int) -> JSONResponse:
+    """
+    Get the progress of a Civitai download job.
+    
+    :param job_id: The id of the job.
+    :return: JSONResponse containing the status, progress and statistics of the job.
+    """
+    status = get_sync_job_status(job_id)
+    if status is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(status)
+
+def api_cancel_sync_job(job_id : int) -> JSONResponse:
+    """
+    Cancels a running Civitai download job.
+    
+    :param job_id: The id of the job.
+    :return: JSONResponse containing whether a running job was cancelled ("success").
+    """
+    return JSONResponse({"success": cancel_sync_job(job_id)})
+
+def find_notes(query : str, limit : int = 20, model_type : Optional[ModelType] = None) -> List[Dict[str, Any]]:
+    """
+    Searches all notes and adds the names of the models the notes belong to.
+
+    :param query: The words to search for.
+    :param limit: The maximum number of results.
+    :param model_type: Only return notes of this model type or None for all types.
+    :return: A list of dictionaries containing the "hash", "type" and "names" of the models and the "snippet" of the note as HTML, the best matches first.
+    """
+    results = search_notes(query, limit, model_type)
+    if not results:
+        return []
+    model_names = get_model_names_by_hash({result_type for _, result_type, _ in results})
+    return [{
+        "hash": model_hash,
+        "type": result_type.name,
+        "names": [name for name_type, name in model_names.get(model_hash, []) if name_type == result_type],
+        "snippet": snippet,
+    } for model_hash, result_type, snippet in results]
+
+def api_search_notes(q : str, limit : int = 20, type : Optional[str] = None) -> JSONResponse:
+    """
+    Searches all notes for the given words.
+    
+    :param q: The words to search for. Notes have to contain all words, the last word may also be the beginning of a word.
+    :param limit: The maximum number of results.
+    :param type: Only search notes of this model type. Any format of string is accepted and will be converted to the correct format.
+    :return: JSONResponse containing the "results", the best matches first. Every result has the "hash", "type" and "names" of the models and a "snippet" of the note as HTML with the matching words in <mark> tags.
+    """
+    model_type = match_enum(type, ModelType) if type else None
+    return JSONResponse({"results": find_notes(q, max(1, min(limit, 200)), model_type)})
+
+def api_list_notes(type : str, limit : int = 100, offset : int = 0) -> JSONResponse:
+    """
+    Lists the notes of a model type ordered by model name.
+    
+    :param type: The type of the models. Any format of string is accepted and will be converted to the correct format.
+    :param limit: The maximum number of notes, at most 1000.
+    :param offset: The number of notes to skip.
+    :return: JSONResponse containing the "notes", each with the "hash" and "name" of the model and the time it was last changed ("updated_at").
+    """
+    notes = get_notes_by_type(match_enum(type, ModelType), max(1, min(limit, 1000)), max(0, offset))
+    return JSONResponse({"notes": [{"hash": model_hash, "name": model_name, "updated_at": updated_at} for model_hash, model_name, updated_at in notes]})
+
+def api_get_recent_notes(limit : int = 20, type : Optional[str] = None) -> JSONResponse:
+    """
+    Lists the most recently changed notes.
+    
+    :param limit: The maximum number of notes, at most 1000.
+    :param type: Only list notes of this model type. Any format of string is accepted and will be converted to the correct format.
+    :return: JSONResponse containing the "notes" newest first, each with the "hash", "type" and "name" of the model and the time it was last changed ("updated_at").
+    """
+    model_type = match_enum(type, ModelType) if type else None
+    notes = get_recent_notes(max(1, min(limit, 1000)), model_type)
+    return JSONResponse({"notes": [{"hash": model_hash, "type": note_type.name, "name": model_name, "updated_at": updated_at} for model_hash, note_type, model_name, updated_at in notes]})
+
+def api_filter_models(q : str, type : str) -> JSONResponse:
+    """
+    Returns the names of all models of a type whose note contains the given words, used to filter the extra network cards.
+    
+    :param q: The words to search for, see `api_search_notes`.
+    :param type: The type of the models. Any format of string is accepted and will be converted to the correct format.
+    :return: JSONResponse containing the "names" of all matching models, the best matches first.
+    """
+    model_type = match_enum(type, ModelType)
+    model_hashes = search_note_hashes(q, model_type)
+    if not model_hashes:
+        return JSONResponse({"names": []})
+    model_names = get_model_names_by_hash([model_type])
+    return JSONResponse({"names": [name for model_hash in model_hashes for _, name in model_names.get(model_hash, [])]})
+
+loaded_model_version = 0 # Increased every time the webui loads a checkpoint
+loaded_model_lock = threading.Lock()
+loaded_model_waiters : List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = [] # Requests waiting for the next checkpoint
+
+def on_model_loaded(sd_model) -> None:
+    """
+    Called by the webui after a checkpoint was loaded, wakes all requests waiting for a new checkpoint.
+
+    :param sd_model: The loaded model.
+    :return: None.
+    """
+    global loaded_model_version
+    with loaded_model_lock:
+        loaded_model_version += 1
+        waiters = loaded_model_waiters[:]
+        loaded_model_waiters.clear()
+    for loop, future in waiters:
+        loop.call_soon_threadsafe(lambda future=future: future.done() or future.set_result(None))
+
+def get_loaded_model_note() -> Dict[str, Any]:
+    """
+    Returns the note of the loaded checkpoint.
+
+    :return: A dictionary containing the "version" of the loaded checkpoint, its "name", its "hash" and its "note".
+    """
+    model_hash = shared.opts.sd_checkpoint_hash
+    return {
+        "version": loaded_model_version,
+        "name": shared.opts.sd_model_checkpoint,
+        "hash": model_hash,
+        "note": get_note(model_hash) if model_hash else "",
+    }
+
+async def api_get_loaded_model(version : int = -1, timeout : float = 30) -> JSONResponse:
+    """
+    Returns the note of the loaded checkpoint as soon as it differs from the given version.
+    Requests with the current version wait until the webui loads another checkpoint or the timeout ends, so the browser does not need to poll.
+    
+    :param version: The version of the checkpoint the browser knows about, -1 to return immediately.
+    :param timeout: The number of seconds to wait for another checkpoint, at most 60.
+    :return: JSONResponse containing the "version" of the loaded checkpoint, its "name", its "hash" and its "note".
+    """
+    if version == loaded_model_version:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with loaded_model_lock:
+            if version == loaded_model_version:
+                loaded_model_waiters.append(waiter)
+            else:
+                future.set_result(None)
+        try:
+            await asyncio.wait_for(future, timeout=max(0, min(timeout, 60)))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with loaded_model_lock:
+                if waiter in loaded_model_waiters:
+                    loaded_model_waiters.remove(waiter)
+    return JSONResponse(await run_in_threadpool(get_loaded_model_note))
+
+def api_get_cache_stats() -> JSONResponse:
+    """
+    Returns the statistics of the note cache.
+    
+    :return: JSONResponse containing the statistics of the "notes" and the rendered "html" cache.
+    """
+    return JSONResponse({"notes": note_cache.stats(), "html": html_cache.stats()})
+
+def add_api_endpoints(fastapi) -> None:
+    """
+    Adds all API endpoints
+    
+    :param fastapi: Instance of fastapi.
+    :return: None.
+    """
+    fastapi.add_api_route("/model_notes/get_note_by_hash", api_get_note_by_hash, methods=["GET"])
+    fastapi.add_api_route("/model_notes/get_note_by_name", api_get_note_by_name, methods=["GET"])
+    fastapi.add_api_route("/model_notes/set_note_by_hash", api_set_note_by_hash, methods=["POST"])
+    fastapi.add_api_route("/model_notes/set_note_by_name", api_set_note_by_name, methods=["POST"])
+    fastapi.add_api_route("/model_notes/get_notes", api_get_notes, methods=["POST"])
+    fastapi.add_api_route("/model_notes/set_notes", api_set_notes, methods=["POST"])
+    fastapi.add_api_route("/model_notes/set_note", api_set_note, methods=["POST"])
+    fastapi.add_api_route("/model_notes/utils/convert_markdown_to_html", api_convert_text_to_html, methods=["GET"]) # Kept for compatibility, prefer the POST endpoint
+    fastapi.add_api_route("/model_notes/utils/convert_markdown_to_html", api_convert_markdown_to_html, methods=["POST"])
+    fastapi.add_api_route("/model_notes/jobs", api_get_sync_jobs, methods=["GET"])
+    fastapi.add_api_route("/model_notes/jobs", api_create_sync_job, methods=["POST"])
+    fastapi.add_api_route("/model_notes/jobs/{job_id}", api_get_sync_job, methods=["GET"])
+    fastapi.add_api_route("/model_notes/jobs/{job_id}/cancel", api_cancel_sync_job, methods=["POST"])
+    fastapi.add_api_route("/model_notes/search", api_search_notes, methods=["GET"])
+    fastapi.add_api_route("/model_notes/filter", api_filter_models, methods=["GET"])
+    fastapi.add_api_route("/model_notes/list", api_list_notes, methods=["GET"])
+    fastapi.add_api_route("/model_notes/recent", api_get_recent_notes, methods=["GET"])
+    fastapi.add_api_route("/model_notes/loaded_model", api_get_loaded_model, methods=["GET"])
+    fastapi.add_api_route("/model_notes/utils/cache_stats", api_get_cache_stats, methods=["GET"])
+
+def on_app_started(gradio, fastapi) -> None:
+    """
+    Called when the application starts.
+    
+    :param gradio: Instance of gradio.
+    :param fastapi: Instance of fastapi.
+    :return: None.
+    """
+    create_connection(Path(Path(__file__).parent.parent.resolve(), "notes.db"))
+    setup_db()
+    load_hash_index()
+    backfill_model_names()
+    warm_note_cache()
+    add_api_endpoints(fastapi)
+    start_sync_worker()
+    overwrite_load_descriptions()
+
+def load_hash_index() -> None:
+    """
+    Loads the saved model hashes into memory.
+
+    :return: None.
+    """
+    sql = """
+    SELECT path, size, mtime, sha256 FROM model_hashes
+    """
+    global hash_index_generation
+    rows = execute_sql(sql) or []
+    with hash_index_lock:
+        hash_index.update({path: (size, mtime, sha256) for path, size, mtime, sha256 in rows})
+        hash_index_generation += 1
+
+def get_indexed_sha256(path : str) -> Optional[str]:
+    """
+    Returns the saved sha256 of the given model file if the file was not changed since it was hashed.
+
+    :param path: The path of the model file.
+    :return: The sha256 of the file or None if the file was never hashed or changed since.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with hash_index_lock:
+        entry = hash_index.get(path)
+    if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+        return entry[2]
+    return None
+
+def add_to_hash_index(path : str, sha256 : str) -> None:
+    """
+    Saves the sha256 of the given model file together with its current size and modification time.
+
+    :param path: The path of the model file.
+    :param sha256: The sha256 of the file.
+    :return: None.
+    """
+    sql = """
+    REPLACE INTO model_hashes(path, size, mtime, sha256) VALUES(?, ?, ?, ?);
+    """
+    global hash_index_generation
+    stat = os.stat(path)
+    with hash_index_lock:
+        hash_index[path] = (stat.st_size, stat.st_mtime, sha256)
+        hash_index_generation += 1
+    execute_sql(sql, path, stat.st_size, stat.st_mtime, sha256)
+
+def hash_model_file(path : str, title : str) -> str:
+    """
+    Calculates the sha256 of the given model file and saves it in the hash index.
+
+    :param path: The path of the model file.
+    :param title: The title of the model used in the hash cache of the webui.
+    :return: The sha256 of the file.
+    """
+    try:
+        sha256 = hashes.sha256(path, title)
+        add_to_hash_index(path, sha256)
+        return sha256
+    except Exception:
+        try:
+            stat = os.stat(path)
+            with hash_index_lock:
+                failed_hashes[path] = (stat.st_size, stat.st_mtime)
+        except OSError:
+            pass # The file was removed, so there is nothing to hash again
+        raise
+    finally:
+        with hash_index_lock:
+            pending_hashes.pop(path, None)
+
+def is_hash_pending(model_type : ModelType, model_name : str) -> bool:
+    """
+    Returns whether the given model is queued for hashing or being hashed right now.
+
+    :param model_type: The type of model.
+    :param model_name: The name of the model.
+    :return: Whether a hash job for the model file exists.
+    """
+    path = get_model_file(model_type, model_name)[0]
+    with hash_index_lock:
+        return path is not None and path in pending_hashes
+
+def get_model_file(model_type : ModelType, model_name : str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns the file path of the given model and the title used in the hash cache of the webui.
+
+    :param model_type: The type of model.
+    :param model_name: The name of the model.
+    :return: A tuple containing the path and the title or (None, None) if the model does not exist.
+    """
+    info = model_type_infos.get(model_type)
+    if info is None or model_name is None:
+        return None, None
+    return info.get_file(model_name)
+
+def iter_models(model_types : Optional[Iterable[ModelType]] = None, resolve_hashes : bool = True) -> Iterator[ModelRecord]:
+    """
+    Lazily yields all models of the given types.
+    When hashes are resolved then hashing of all models that were not hashed before is started in the background first, so models are hashed in parallel while the records are consumed.
+
+    :param model_types: The types of the models or None for all supported types.
+    :param resolve_hashes: Whether to resolve the sha256 of every model, waiting for models that are still being hashed.
+    :return: An iterator over the models.
+    """
+    models : List[Tuple[ModelType, str, str]] = []
+    for model_type in (model_types if model_types is not None else model_type_infos.keys()):
+        info = model_type_infos[model_type]
+        for name in info.list_models():
+            path = info.get_file(name)[0]
+            if path is not None:
+                models.append((model_type, name, path))
+    if resolve_hashes:
+        for model_type, name, path in models:
+            get_model_sha256(model_type, name, blocking=False)
+    for model_type, name, path in models:
+        yield ModelRecord(model_type, name, path, get_model_sha256(model_type, name) if resolve_hashes else None)
+
+model_names_index : Dict[ModelType, Tuple[Tuple[str, ...], int, Dict[str, List[str]]]] = {} # The listed names of every model type, the hash index generation they were resolved with and the names of the models by their sha256
+
+def get_indexed_model_sha256(model_type : ModelType, model_name : str) -> Optional[str]:
     """
-    Converts the given text to HTML.
-    
-    :param text: The text that should be converted.
-    :return: JSONResponse containing the "html".
+    Returns the sha256 of the given model if it is already known, without hashing the model.
+
+    :param model_type: The type of model.
+    :param model_name: The name of the model.
+    :return: The sha256 of the model or None if the model does not exist or was not hashed yet.
     """
-    html = convert_markdown_to_html(text)
-    return JSONResponse({"html": html})
+    if model_type == ModelType.Checkpoint:
+        checkpoint_info = get_checkpoint_info(model_name)
+        if checkpoint_info is not None and checkpoint_info.sha256:
+            return checkpoint_info.sha256
+    path = get_model_file(model_type, model_name)[0]
+    return get_indexed_sha256(path) if path is not None else None
+
+def get_model_names_by_hash(model_types : Optional[Iterable[ModelType]] = None) -> Dict[str, List[Tuple[ModelType, str]]]:
+    """
+    Maps the sha256 of all models that were already hashed to their names. No model is hashed for this.
+    The names of a model type are only resolved again after its models were refreshed or new hashes were indexed, so searching doesn't look at every model file.
+
+    :param model_types: The types of the models or None for all supported types.
+    :return: A dictionary mapping the sha256 of every hashed model to the types and names of all models with that hash.
+    """
+    models : Dict[str, List[Tuple[ModelType, str]]] = {}
+    for model_type in (model_types if model_types is not None else model_type_infos.keys()):
+        names = tuple(model_type_infos[model_type].list_models())
+        generation = hash_index_generation
+        cached = model_names_index.get(model_type)
+        if cached is not None and cached[0] == names and cached[1] == generation:
+            names_by_hash = cached[2]
+        else:
+            names_by_hash = {}
+            for name in names:
+                sha256 = get_indexed_model_sha256(model_type, name)
+                if sha256 is not None:
+                    names_by_hash.setdefault(sha256, []).append(name)
+            model_names_index[model_type] = (names, generation, names_by_hash)
+        for sha256, type_names in names_by_hash.items():
+            models.setdefault(sha256, []).extend((model_type, name) for name in type_names)
+    return models
 
-def add_api_endpoints(fastapi) -> None:
+def count_models(model_types : Optional[Iterable[ModelType]] = None) -> int:
     """
-    Adds all API endpoints
-    
-    :param fastapi: Instance of fastapi.
-    :return: None.
+    Returns the number of models of the given types.
+
+    :param model_types: The types of the models or None for all supported types.
+    :return: The number of models.
     """
-    fastapi.add_api_route("/model_notes/get_note_by_hash", api_get_note_by_hash, methods=["GET"])
-    fastapi.add_api_route("/model_notes/get_note_by_name", api_get_note_by_name, methods=["GET"])
-    fastapi.add_api_route("/model_notes/set_note_by_hash", api_set_note_by_hash, methods=["POST"])
-    fastapi.add_api_route("/model_notes/set_note_by_name", api_set_note_by_name, methods=["POST"])
-    fastapi.add_api_route("/model_notes/utils/convert_markdown_to_html", api_convert_text_to_html, methods=["GET"])
+    return sum(len(model_type_infos[model_type].list_models()) for model_type in (model_types if model_types is not None else model_type_infos.keys()))
 
-def on_app_started(gradio, fastapi) -> None:
+def batched(iterable : Iterable, size : int) -> Iterator[list]:
     """
-    Called when the application starts.
-    
-    :param gradio: Instance of gradio.
-    :param fastapi: Instance of fastapi.
-    :return: None.
+    Splits an iterable into lists of the given size.
+
+    :param iterable: The iterable to split.
+    :param size: The maximum size of every list.
+    :return: An iterator over the lists.
     """
-    create_connection(Path(Path(__file__).parent.parent.resolve(), "notes.db"))
-    setup_db()
-    add_api_endpoints(fastapi)
-    overwrite_load_descriptions()
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-def get_model_sha256(model_type : ModelType, model_name : str) -> str:
+def get_model_sha256(model_type : ModelType, model_name : str, blocking : bool = True) -> Optional[str]:
     """
     Returns the sha256 of the given model.
+    The hash is read from the hash index and the model file is only hashed again if its size or modification time changed.
+    Hashing always runs in a background thread.
 
     :param model_type: The type of model.
     :param model_name: The name of the model.
-    :return: The sha256 of the model.
+    :param blocking: Whether to wait for the model to be hashed. If False then None is returned while the model is still being hashed.
+    :return: The sha256 of the model or None if the model does not exist, is still being hashed or could not be hashed.
     """
     if model_type == ModelType.Checkpoint:
-        checkpoint_info : Optional[CheckpointInfo] = checkpoint_alisases.get(model_name)
-        if checkpoint_info is None:
-            return
-        sha256 = checkpoint_info.sha256
-    elif model_type == ModelType.Hypernetwork:
-        hypernetwork_path = shared.hypernetworks.get(model_name)
-        sha256 = hashes.sha256(hypernetwork_path, f'hypernet/{model_name}')
-    elif model_type == ModelType.LoRA:
-        lora_on_disk = lora.available_loras[model_name]
-        sha256 = hashes.sha256(lora_on_disk.filename, f'lora/{lora_on_disk.name}')
-    elif model_type == ModelType.Textual_Inversion:
-        embedding = model_hijack.embedding_db.word_embeddings[model_name]
-        sha256 = hashes.sha256(embedding.filename, f'textual_inversion/{embedding.name}')
-    return str(sha256)
+        checkpoint_info = get_checkpoint_info(model_name)
+        if checkpoint_info is not None and checkpoint_info.sha256:
+            return checkpoint_info.sha256
+    path, title = get_model_file(model_type, model_name)
+    if path is None:
+        return None
+    sha256 = get_indexed_sha256(path)
+    if sha256 is not None:
+        return sha256
+    sha256_from_cache = getattr(hashes, "sha256_from_cache", None) # Not available in older webui versions
+    sha256 = sha256_from_cache(path, title) if sha256_from_cache is not None else None
+    if sha256 is not None:
+        add_to_hash_index(path, sha256)
+        return sha256
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with hash_index_lock:
+        if failed_hashes.get(path) == (stat.st_size, stat.st_mtime):
+            return None
+        future = pending_hashes.get(path)
+        if future is None:
+            future = hash_executor.submit(hash_model_file, path, title)
+            pending_hashes[path] = future
+    if not blocking:
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Failed to hash {path}: {e}")
+        return None
 
 def on_model_selection(model_type : ModelType, model_name : str) -> str:
     """
@@ -372,79 +1889,349 @@ def on_model_selection(model_type : ModelType, model_name : str) -> str:
     :param model_name: The name of the model.
     :return: The note associated with the model.
     """
-    result = get_note(get_model_sha256(model_type, model_name))
-    return gr.update(value=result, interactive=True, lines=result.count("\n") + 1)
+    sha256 = get_model_sha256(model_type, model_name, blocking=False)
+    if sha256 is None:
+        # Keep the note box locked until the model was hashed so an empty note can't overwrite the saved one
+        return gr.update(value="", interactive=False, lines=1, placeholder="The model is still being hashed, please select it again in a moment.")
+    result = get_note(sha256)
+    return gr.update(value=result, interactive=True, lines=result.count("\n") + 1, placeholder="Make a note about the model selected above!")
 
-def on_save_note(model_type : ModelType, model_name : str, note : str) -> None:
+def on_save_note(model_type : ModelType, model_name : str, note : str, autosave : bool = False) -> None:
     """
     Save a note for the selected model.
     
     :param model_type: The type of the model.
     :param model_name: The name of the model.
     :param note: The note that should be saved.
+    :param autosave: Whether the note was edited with autosaving enabled, in which case it is saved once the edits stop, see `schedule_note`.
     :return: The note associated with the model.
     """
-    set_note(model_hash=get_model_sha256(model_type, model_name), note=note, model_type=model_type)
+    sha256 = get_model_sha256(model_type, model_name, blocking=False)
+    if sha256 is None:
+        return # The note box is locked while the model is still being hashed
+    if autosave:
+        schedule_note(model_hash=sha256, note=note, model_type=model_type, model_name=model_name)
+    else:
+        set_note(model_hash=sha256, note=note, model_type=model_type, model_name=model_name)
+
+class RateLimiter:
+    """
+    A token bucket shared by all threads that limits the rate of requests.
+    A pause, for example requested through a Retry-After header, holds back every thread and not only the one that received it.
+
+    :param rate: The number of requests allowed per second.
+    :param capacity: The number of requests that can be made at once after being idle.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a request may be made.
+
+        :return: None.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stops all requests for the given number of seconds.
+
+        :param seconds: The number of seconds to wait before the next request.
+        :return: None.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+civitai_session = requests.Session()
+civitai_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+civitai_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+civitai_rate_limiter = RateLimiter(rate=4, capacity=4)
+
+def civitai_request(url : str, max_attempts : int = 5, **kwargs) -> Optional[Response]:
+    """
+    Sends a GET request through the shared session, respecting the shared rate limit.
+    When Civitai answers with 429 then all requests are paused for the duration given in the Retry-After header before retrying.
+
+    :param url: The requested url.
+    :param max_attempts: The maximum number of attempts if the request is rate limited.
+    :param kwargs: Any additional arguments passed to requests.
+    :return: The response or None if the request failed.
+    """
+    for _ in range(max_attempts):
+        civitai_rate_limiter.acquire()
+        try:
+            response : Response = civitai_session.get(url, timeout=30, **kwargs)
+        except requests.RequestException as e:
+            print(f"Request to {url} failed: {e}")
+            return None
+        if response.status_code != 429:
+            return response
+        try:
+            retry_after = float(response.headers.get("Retry-After", 10))
+        except ValueError:
+            retry_after = 10
+        civitai_rate_limiter.pause(retry_after)
+    return None
+
+def get_civitai_api_url() -> str:
+    """
+    Returns the base url of the Civitai API without a trailing slash.
+
+    :return: The base url of the Civitai API.
+    """
+    return shared.opts.model_note_civitai_api_url.rstrip("/")
+
+def fetch_civitai_json(key : str, url : str) -> Optional[dict]:
+    """
+    Returns the JSON response of the Civitai API for the given url, using the response cache in the database.
+    Cached responses are used without a request until they are older than the configured cache duration, afterwards they are revalidated with a conditional request.
+    Responses for models that Civitai does not know are cached as well.
+
+    :param key: The key of the response in the cache.
+    :param url: The requested url.
+    :return: The JSON response or None if Civitai does not know the requested model.
+    :raises ConnectionError: If Civitai could not be reached or answered with invalid JSON and no cached response exists.
+    """
+    select_sql = """
+    SELECT status, body, etag, last_modified, fetched_at FROM civitai_cache WHERE key = ?
+    """
+    replace_sql = """
+    REPLACE INTO civitai_cache(key, status, body, etag, last_modified, fetched_at) VALUES(?, ?, ?, ?, ?, ?);
+    """
+    touch_sql = """
+    UPDATE civitai_cache SET fetched_at = ? WHERE key = ?
+    """
+    rows = execute_sql(select_sql, key) or []
+    cached = rows[0] if rows else None
+    if cached is not None:
+        status, body, etag, last_modified, fetched_at = cached
+        if time.time() - fetched_at < float(shared.opts.model_note_civitai_cache_hours) * 3600:
+            return json.loads(body) if status == 200 else None
+
+    headers = {}
+    if cached is not None and cached[0] == 200:
+        if cached[2]:
+            headers["If-None-Match"] = cached[2]
+        if cached[3]:
+            headers["If-Modified-Since"] = cached[3]
+    response = civitai_request(url, headers=headers)
+    if response is None:
+        if cached is not None:
+            return json.loads(cached[1]) if cached[0] == 200 else None # Better outdated than nothing
+        raise ConnectionError(f"Could not reach {url}")
+    if response.status_code == 304 and cached is not None:
+        execute_sql(touch_sql, time.time(), key)
+        return json.loads(cached[1])
+    if response.status_code == 200:
+        try:
+            data = response.json()
+        except ValueError as e:
+            # Error pages of proxies or maintenance pages are not cached, the lookup is tried again later
+            if cached is not None:
+                return json.loads(cached[1]) if cached[0] == 200 else None
+            raise ConnectionError(f"Civitai answered {url} with invalid JSON: {e}")
+        execute_sql(replace_sql, key, 200, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"), time.time())
+        return data
+    if response.status_code == 404:
+        execute_sql(replace_sql, key, 404, None, None, None, time.time())
+        return None
+    raise ConnectionError(f"Civitai answered {url} with status {response.status_code}")
+
+class CivitaiLookup:
+    """
+    Fetches the Civitai metadata of models and remembers it, so every hash and every Civitai model is only requested once.
+    Threads asking for the same data at the same time wait for a single request instead of sending their own.
+    Failed requests are not remembered, so they are sent again when the data is asked for the next time.
+    """
+
+    def __init__(self):
+        self._results : Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _fetch_once(self, key : str, url : str) -> Optional[dict]:
+        with self._lock:
+            future = self._results.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._results[key] = future
+        if is_owner:
+            try:
+                future.set_result(fetch_civitai_json(key, url))
+            except Exception as e:
+                # Only the threads already waiting share the failure, the next call sends a new request
+                with self._lock:
+                    self._results.pop(key, None)
+                future.set_exception(e)
+        return future.result()
+
+    def get_model_version(self, sha256 : str) -> Optional[dict]:
+        """
+        Returns the Civitai model version with the given hash.
+
+        :param sha256: The sha256 of the model.
+        :return: The model version as returned by the Civitai API or None if it was not found.
+        """
+        return self._fetch_once(f"version/{sha256}", f"{get_civitai_api_url()}/model-versions/by-hash/{sha256}")
+
+    def get_model(self, model_id) -> Optional[dict]:
+        """
+        Returns the Civitai model with the given id.
+
+        :param model_id: The id of the model on Civitai.
+        :return: The model as returned by the Civitai API or None if it was not found.
+        """
+        return self._fetch_once(f"model/{model_id}", f"{get_civitai_api_url()}/models/{model_id}")
+
+    def get_info(self, sha256 : str) -> Tuple[Optional[dict], Optional[dict]]:
+        """
+        Returns the Civitai model version with the given hash and the model it belongs to.
+
+        :param sha256: The sha256 of the model.
+        :return: A tuple containing the model version and the model. Each of them is None if it was not found.
+        """
+        model_version_info = self.get_model_version(sha256) if sha256 else None
+        if model_version_info is None or model_version_info.get("modelId") is None:
+            return model_version_info, None
+        return model_version_info, self.get_model(model_version_info.get("modelId"))
+
+def format_civitai_description(model_version_info : dict, model_info : dict, download_markdown : bool) -> str:
+    """
+    Formats the descriptions of a Civitai model and model version into a note.
+
+    :param model_version_info: The model version as returned by the Civitai API.
+    :param model_info: The model as returned by the Civitai API.
+    :param download_markdown: Whether to convert the description in into the markdown format
+    :return: The formatted model description.
+    """
+    formatted_model_description : str = f'Model Description:\n{model_info.get("description")}\n\nVersion Description:\n{model_version_info.get("description")}\n\nTrigger Words:\n{", ".join(model_version_info.get("trainedWords") or [])}'
+    if download_markdown:
+        formatted_model_description = html2markdown.convert(formatted_model_description)
+    else:
+        soup = BeautifulSoup(formatted_model_description, 'html.parser')
+        formatted_model_description = soup.get_text("\n", strip=True)
+    return formatted_model_description
+
+def save_preview_image(source_path : str, local_path : str) -> None:
+    """
+    Saves an image as preview, converted to the format matching the extension of the preview path and scaled down to the configured preview size.
+    The preview is written to a temporary file first, so an existing preview is only replaced by a complete image.
+
+    :param source_path: The path of the downloaded image.
+    :param local_path: The path where the preview should be saved.
+    :return: None.
+    :raises OSError: If the image could not be read or saved.
+    """
+    max_size = int(shared.opts.model_note_preview_max_size)
+    ext = os.path.splitext(local_path)[1].lower()
+    image_format = Image.registered_extensions().get(ext, "PNG")
+    with Image.open(source_path) as image:
+        image.load() # Fails for truncated images
+        if max_size > 0:
+            image.thumbnail((max_size, max_size))
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(local_path), prefix=".model_notes_", suffix=ext)
+        os.close(fd)
+        try:
+            image.save(tmp_path, format=image_format)
+            os.chmod(tmp_path, default_file_mode)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def download_preview_image(model_version_info : dict, local_path : str) -> bool:
+    """
+    Downloads and saves the first preview image of a Civitai model version.
+    The image is streamed into a temporary file and only saved as preview if it is a complete image.
+
+    :param model_version_info: The model version as returned by the Civitai API.
+    :param local_path: The path where the image should be saved.
+    :return: Whether the image was successfully downloaded.
+    """
+    civitai_preview_images : List[dict] = model_version_info.get("images") or []
+    if len(civitai_preview_images) == 0:
+        return False
+    image_url = civitai_preview_images[0].get("url")
+    image_data = civitai_request(image_url, stream=True)
+    if image_data is None or image_data.status_code != 200:
+        return False
+    # Read large images in larger chunks, between 64 KiB and 1 MiB
+    content_length = int(image_data.headers.get("Content-Length") or 0)
+    chunk_size = min(max(content_length // 16, 64 * 1024), 1024 * 1024)
+    fd, download_path = tempfile.mkstemp(dir=os.path.dirname(local_path), prefix=".model_notes_", suffix=".download")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            for chunk in image_data.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+        save_preview_image(download_path, local_path)
+        return True
+    except Exception as e:
+        print(f"Failed to save preview image from {image_url}: {e}")
+        return False
+    finally:
+        image_data.close()
+        if os.path.exists(download_path):
+            os.remove(download_path)
 
-def download_description_from_civit(model_type : ModelType, model_name : str, download_markdown: bool) -> str:
+def download_description_from_civit(model_type : ModelType, model_name : str, download_markdown: bool, lookup : Optional[CivitaiLookup] = None) -> str:
     """
     Downloads the model description from Civitai.
 
     :param model_type: The type of the model.
     :param model_name: The name of the model.
     :param download_markdown: Whether to convert the description in into the markdown format
+    :param lookup: The lookup used to fetch the metadata. A new lookup is used if None.
     :return: The formatted model description.
     """
-    model_version_info : Response = requests.get(f"https://civitai.com/api/v1/model-versions/by-hash/{get_model_sha256(model_type, model_name)}")
-    if model_version_info.status_code == 200:
-        model_version_info_json : dict = model_version_info.json()
-        civitai_model_id : str = model_version_info_json.get("modelId")
-        model_info : Response = requests.get(f"https://civitai.com/api/v1/models/{civitai_model_id}")
-        if model_info.status_code == 200:
-            model_info_json : dict = model_info.json()
-            formatted_model_description : str = f'Model Description:\n{model_info_json.get("description")}\n\nVersion Description:\n{model_version_info_json.get("description")}\n\nTrigger Words:\n{", ".join(model_version_info_json.get("trainedWords"))}'
-            if download_markdown:
-                formatted_model_description = html2markdown.convert(formatted_model_description)
-            else:
-                soup = BeautifulSoup(formatted_model_description, 'html.parser')
-                formatted_model_description = soup.get_text("\n", strip=True)
-            return formatted_model_description
-        elif model_info.status_code == 429:
-            time.sleep(int(model_info.headers["Retry-After"]))
-            return download_description_from_civit(model_type, model_name, download_markdown)
-    elif model_version_info.status_code == 429:
-        time.sleep(int(model_version_info.headers["Retry-After"]))
-        return download_description_from_civit(model_type, model_name, download_markdown)
-    return ""
-
-def download_image_from_civitai(model_type : ModelType, model_name : str, local_path: str) -> bool:
+    try:
+        model_version_info, model_info = (lookup or CivitaiLookup()).get_info(get_model_sha256(model_type, model_name))
+    except ConnectionError as e:
+        print(e)
+        return ""
+    if model_version_info is None or model_info is None:
+        return ""
+    return format_civitai_description(model_version_info, model_info, download_markdown)
+
+def download_image_from_civitai(model_type : ModelType, model_name : str, local_path: str, lookup : Optional[CivitaiLookup] = None) -> bool:
     """
     Downloads and saves a preview image from civitai.
 
     :param model_type: The type of the model.
     :param model_name: The name of the model.
     :param local_path: The path where the image should be saved.
+    :param lookup: The lookup used to fetch the metadata. A new lookup is used if None.
     :return: Whether the image was successfully downloaded.
     """
-    model_version_info : Response = requests.get(f"https://civitai.com/api/v1/model-versions/by-hash/{get_model_sha256(model_type, model_name)}")
-    if model_version_info.status_code == 200:
-        model_version_info_json : dict = model_version_info.json()
-        civitai_preview_images : List[dict] = model_version_info_json.get("images")
-        if len(civitai_preview_images) > 0:
-            image_url = civitai_preview_images[0].get("url")
-            image_data = requests.get(image_url, stream=True)
-            if image_data.status_code == 200:
-                with open(local_path, 'wb') as file:
-                    for chunk in image_data.iter_content(chunk_size=8192):
-                        file.write(chunk)
-                return True
-            elif image_data.status_code == 429:
-                time.sleep(int(image_data.headers["Retry-After"]))
-                return download_image_from_civitai(model_type, model_name)
-    elif model_version_info.status_code == 429:
-        time.sleep(int(model_version_info.headers["Retry-After"]))
-        return download_image_from_civitai(model_type, model_name)
-    return False
+    try:
+        model_version_info = (lookup or CivitaiLookup()).get_model_version(get_model_sha256(model_type, model_name))
+    except ConnectionError as e:
+        print(e)
+        return False
+    if model_version_info is None:
+        return False
+    return download_preview_image(model_version_info, local_path)
 
 def on_civitai(model_type : ModelType, model_name : str, model_note : str) -> str:
     """
@@ -461,143 +2248,283 @@ def on_civitai(model_type : ModelType, model_name : str, model_note : str) -> st
     else:
         return gr.update(value=model_note, interactive=True)
 
-def on_get_all_civitai(model_types, overwrite : bool, dl_markdown : bool, dl_preview_image : bool, dl_preview_image_overwrite : bool, pr=gr.Progress()):
+def sync_model_with_civitai(model_type : ModelType, model_name : str, overwrite : bool, dl_markdown : bool, preview_path : Optional[str], lookup : CivitaiLookup) -> Tuple[ResultType, Optional[ResultType]]:
+    """
+    Downloads the description and optionally the preview image of a single model from civitai.
+
+    :param model_type: The type of the model.
+    :param model_name: The name of the model.
+    :param overwrite: Whether to overwrite an existing note.
+    :param dl_markdown: Whether to convert the description in into the markdown format
+    :param preview_path: The path where the preview image should be saved or None if no preview image should be downloaded.
+    :param lookup: The lookup shared by all models of this run.
+    :return: A tuple containing the result of the description and the result of the preview image, which is None if no preview image was requested. `ResultType.error` means that Civitai could not be reached and the model should be tried again later.
+    """
+    sha256 = get_model_sha256(model_type, model_name)
+    skip_description = not overwrite and get_note(model_hash=sha256) != ""
+    try:
+        if skip_description:
+            model_version_info, model_info = (lookup.get_model_version(sha256) if sha256 and preview_path is not None else None), None
+        else:
+            model_version_info, model_info = lookup.get_info(sha256)
+    except ConnectionError as e:
+        print(e)
+        return ResultType.error, ResultType.error if preview_path is not None else None
+
+    preview_result = None
+    if preview_path is not None:
+        preview_result = ResultType.success if model_version_info is not None and download_preview_image(model_version_info, preview_path) else ResultType.not_found
+
+    if skip_description:
+        description_result = ResultType.skipped
+    elif model_version_info is not None and model_info is not None:
+        set_note(model_hash=sha256, note=format_civitai_description(model_version_info, model_info, dl_markdown), model_type=model_type, model_name=model_name)
+        description_result = ResultType.success
+    else:
+        description_result = ResultType.not_found
+    return description_result, preview_result
+
+sync_event = threading.Event() # Wakes the sync worker when a job was added or cancelled
+sync_worker_stop = threading.Event()
+sync_worker_thread : Optional[threading.Thread] = None
+sync_retry_delay = 60 # Seconds until a model is tried again after Civitai could not be reached
+sync_max_attempts = 3
+
+def create_sync_job(model_types : List[str], overwrite : bool, dl_markdown : bool, dl_preview_image : bool, dl_preview_image_overwrite : bool) -> int:
     """
-    Gets the model descriptions for all selected models from civitai
+    Creates a job that downloads the descriptions of all models of the given types from civitai in the background.
 
     :param model_types: The selected model types.
     :param overwrite: Whether to overwrite existing notes.
     :param dl_markdown: Whether to convert the description in into the markdown format
     :param dl_preview_image: Whether to download the preview image
     :param dl_preview_image_overwrite: Whether to overwrite existing preview images
-    :param pr: The progress bar. Do not set this manually.
-    :return: A string containing information about the download
+    :return: The id of the created job.
     """
-    
-    if model_types == []:
-        return "No models selected, nothing to download."
+    job_sql = """
+    INSERT INTO sync_jobs(options, status, created_at) VALUES(?, 'pending', ?);
+    """
+    job_id_sql = """
+    SELECT last_insert_rowid();
+    """
+    model_sql = """
+    INSERT OR IGNORE INTO sync_job_models(job_id, model_type, model_name, preview_path, state, attempts, preview_result) VALUES(?, ?, ?, ?, 'pending', 0, ?);
+    """
+    start_sql = """
+    UPDATE sync_jobs SET status = 'running' WHERE id = ?;
+    """
+    rows = []
+    extra_pages = {}
+    for model in iter_models([get_model_type_by_label(label) for label in model_types], resolve_hashes=False):
+        preview_path, preview_result = None, None
+        if dl_preview_image:
+            info = model_type_infos[model.model_type]
+            extra_page = extra_pages.setdefault(model.model_type, info.extra_page())
+            path, ext = os.path.splitext(model.path)
+            if extra_page.find_preview(path) is None or dl_preview_image_overwrite:
+                preview_path = f"{path}{info.preview_suffix}.{shared.opts.samples_format}"
+            else:
+                preview_result = ResultType.skipped.name
+        rows.append((model.model_type.value, model.name, preview_path, preview_result))
+    options = {"overwrite": overwrite, "dl_markdown": dl_markdown}
+    execute_sql(job_sql, json.dumps(options), time.time())
+    job_id = execute_sql(job_id_sql)[0][0] # Every thread has its own connection, so this is the id of the job inserted above
+    # The worker only runs jobs that are running, so it must not see the job before all of its models were added
+    execute_transaction([(model_sql, [(job_id,) + row for row in rows]), (start_sql, [(job_id,)])])
+    start_sync_worker()
+    return job_id
 
-    if not shared.opts.model_note_markdown:
-        dl_markdown = False
+def cancel_sync_job(job_id : int) -> bool:
+    """
+    Cancels a running job. Models that are currently downloaded are finished first.
 
-    stats = {model: {"success": 0, "failed": 0, "skipped": 0, "img_success": 0, "img_failed": 0, "img_skipped": 0} for model in model_types}
+    :param job_id: The id of the job.
+    :return: Whether a running job was cancelled.
+    """
+    sql = """
+    UPDATE sync_jobs SET status = 'cancelled' WHERE id = ? AND status = 'running';
+    """
+    changes_sql = """
+    SELECT changes();
+    """
+    execute_sql(sql, job_id)
+    cancelled = execute_sql(changes_sql)[0][0] > 0 # Every thread has its own connection, so this counts the update above
+    sync_event.set()
+    return cancelled
+
+def get_sync_job_status(job_id : int) -> Optional[Dict[str, Any]]:
+    """
+    Returns the progress and the statistics of a job.
+
+    :param job_id: The id of the job.
+    :return: A dictionary containing the "id", "status", the number of models per "state", the number of "processed" and "total" models, the statistics per model type and a readable "summary" or None if the job does not exist.
+    """
+    job_sql = """
+    SELECT status, created_at FROM sync_jobs WHERE id = ?
+    """
+    state_sql = """
+    SELECT state, COUNT(*) FROM sync_job_models WHERE job_id = ? GROUP BY state
+    """
+    result_sql = """
+    SELECT model_type, state, description_result, preview_result, COUNT(*) FROM sync_job_models WHERE job_id = ? GROUP BY model_type, state, description_result, preview_result
+    """
+    job = execute_sql(job_sql, job_id)
+    if not job:
+        return None
+    states = {state: count for state, count in execute_sql(state_sql, job_id) or []}
+    stats : Dict[str, Dict[str, int]] = {}
+    for model_type, state, description_result, preview_result, count in execute_sql(result_sql, job_id) or []:
+        label = model_type_infos[ModelType(model_type)].label
+        model_stats = stats.setdefault(label, {"success": 0, "failed": 0, "skipped": 0, "img_success": 0, "img_failed": 0, "img_skipped": 0})
+        for prefix, result in (("", description_result), ("img_", preview_result)):
+            if result == ResultType.success.name:
+                model_stats[f"{prefix}success"] += count
+            elif result == ResultType.skipped.name:
+                model_stats[f"{prefix}skipped"] += count
+            elif result is not None and state != "retry":
+                model_stats[f"{prefix}failed"] += count
+    total = sum(states.values())
+    processed = states.get("done", 0) + states.get("failed", 0)
+    summary = f"Job {job_id} {job[0][0]}: {processed} of {total} models processed. | "
+    for key, value in stats.items():
+        summary += f"{key}: Descriptions: {value['success']} succeeded, {value['failed']} failed, and {value['skipped']} skipped. \nPreviews: {value['img_success']} succeeded, {value['img_failed']} failed, and {value['img_skipped']} skipped. | "
+    return {"id": job_id, "status": job[0][0], "created_at": job[0][1], "states": states, "processed": processed, "total": total, "stats": stats, "summary": summary}
 
-    if "Textual Inversion" in model_types:
-        textual_inversions = get_textual_inversion_embeddings()
-        if dl_preview_image:
-            extra_page = ExtraNetworksPageTextualInversion()
-        for embedding in pr.tqdm(textual_inversions, desc="Downloading Textual Inversion Descriptions", total=len(textual_inversions), unit="embeddings"):
-            if dl_preview_image:
-                path, ext = os.path.splitext(model_hijack.embedding_db.word_embeddings.get(embedding).filename)
-                preview_path = extra_page.find_preview(path)
-                if preview_path is None or dl_preview_image_overwrite:
-                    if download_image_from_civitai(ModelType.Textual_Inversion, embedding, f"{path}.preview.{shared.opts.samples_format}"):
-                        stats["Textual Inversion"]["img_success"] += 1
-                    else:
-                        stats["Textual Inversion"]["img_failed"] += 1
-                else:
-                    stats["Textual Inversion"]["img_skipped"] += 1
-            
-            description = download_description_from_civit(ModelType.Textual_Inversion, embedding, dl_markdown)
-            if not overwrite:
-                note = get_note(model_hash=get_model_sha256(ModelType.Textual_Inversion, embedding))
-                if note != "":
-                    stats["Textual Inversion"]["skipped"] += 1
-                    continue
-            if description != "":
-                set_note(model_hash=get_model_sha256(ModelType.Textual_Inversion, embedding), note=description, model_type=ModelType.Textual_Inversion)
-                stats["Textual Inversion"]["success"] += 1
-            else:
-                stats["Textual Inversion"]["failed"] += 1
+def get_sync_jobs(limit : int = 20) -> List[Dict[str, Any]]:
+    """
+    Returns the most recent jobs, newest first.
 
-    if "Hypernetworks" in model_types:
-        hypernetworks = get_hypernetworks()
-        if dl_preview_image:
-            extra_page = ExtraNetworksPageHypernetworks()
-        for hypernetwork in pr.tqdm(hypernetworks, desc="Downloading Hypernetwork Descriptions", total=len(hypernetworks), unit="hypernetworks"):
-            if dl_preview_image:
-                path, ext = os.path.splitext(shared.hypernetworks.get(hypernetwork))
-                preview_path = extra_page.find_preview(path)
-                if preview_path is None or dl_preview_image_overwrite:
-                    if download_image_from_civitai(ModelType.Hypernetwork, hypernetwork, f"{path}.preview.{shared.opts.samples_format}"):
-                        stats["Hypernetworks"]["img_success"] += 1
-                    else:
-                        stats["Hypernetworks"]["img_failed"] += 1
-                else:
-                    stats["Hypernetworks"]["img_skipped"] += 1
-            
-            description = download_description_from_civit(ModelType.Hypernetwork, hypernetwork, dl_markdown)
-            if not overwrite:
-                note = get_note(model_hash=get_model_sha256(ModelType.Hypernetwork, hypernetwork))
-                if note != "":
-                    stats["Hypernetworks"]["skipped"] += 1
-                    continue
-            if description != "":
-                set_note(model_hash=get_model_sha256(ModelType.Hypernetwork, hypernetwork), note=description, model_type=ModelType.Hypernetwork)
-                stats["Hypernetworks"]["success"] += 1
-            else:
-                stats["Hypernetworks"]["failed"] += 1
+    :param limit: The maximum number of jobs.
+    :return: A list of dictionaries containing the "id", "status" and "created_at" time of the jobs.
+    """
+    sql = """
+    SELECT id, status, created_at FROM sync_jobs ORDER BY id DESC LIMIT ?
+    """
+    return [{"id": job_id, "status": status, "created_at": created_at} for job_id, status, created_at in execute_sql(sql, limit) or []]
 
-    if "Checkpoints" in model_types:
-        checkpoints = checkpoint_tiles()
-        if dl_preview_image:
-            extra_page = ExtraNetworksPageCheckpoints()
-        for checkpoint in pr.tqdm(checkpoints, desc="Downloading Checkpoint Descriptions", total=len(checkpoints), unit="checkpoints"):
-            if dl_preview_image:
-                path, ext = os.path.splitext(sd_models.checkpoints_list.get(checkpoint).filename)
-                preview_path = extra_page.find_preview(path)
-                if preview_path is None or dl_preview_image_overwrite:
-                    if download_image_from_civitai(ModelType.Checkpoint, checkpoint, f"{path}.{shared.opts.samples_format}"):
-                        stats["Checkpoints"]["img_success"] += 1
-                    else:
-                        stats["Checkpoints"]["img_failed"] += 1
-                else:
-                    stats["Checkpoints"]["img_skipped"] += 1
-            
-            description = download_description_from_civit(ModelType.Checkpoint, checkpoint, dl_markdown)
-            if not overwrite:
-                note = get_note(model_hash=get_model_sha256(ModelType.Checkpoint, checkpoint))
-                if note != "":
-                    stats["Checkpoints"]["skipped"] += 1
-                    continue
-            if description != "":
-                set_note(model_hash=get_model_sha256(ModelType.Checkpoint, checkpoint), note=description, model_type=ModelType.Checkpoint)
-                stats["Checkpoints"]["success"] += 1
-            else:
-                stats["Checkpoints"]["failed"] += 1
+def run_sync_job(job_id : int, options : dict) -> None:
+    """
+    Downloads all pending models of a job until it is finished or cancelled.
+    The state of every model is saved as soon as it is processed, so the job can be resumed after a restart.
 
-    if "LoRA" in model_types:
-        loras = get_loras()
-        if dl_preview_image:
-            extra_page = ExtraNetworksPageLora()
-        for lora_item in pr.tqdm(loras, desc="Downloading LoRA Descriptions", total=len(loras), unit="LoRAs"):
-            if dl_preview_image:
-                path, ext = os.path.splitext(lora.available_loras.get(lora_item).filename)
-                preview_path = extra_page.find_preview(path)
-                if preview_path is None or dl_preview_image_overwrite:
-                    if download_image_from_civitai(ModelType.LoRA, lora_item, f"{path}.{shared.opts.samples_format}"):
-                        stats["LoRA"]["img_success"] += 1
-                    else:
-                        stats["LoRA"]["img_failed"] += 1
+    :param job_id: The id of the job.
+    :param options: The options the job was created with.
+    :return: None.
+    """
+    status_sql = """
+    SELECT status FROM sync_jobs WHERE id = ?
+    """
+    pending_sql = """
+    SELECT model_type, model_name, preview_path, attempts FROM sync_job_models WHERE job_id = ? AND (state = 'pending' OR (state = 'retry' AND retry_after <= ?)) LIMIT ?
+    """
+    next_retry_sql = """
+    SELECT MIN(retry_after) FROM sync_job_models WHERE job_id = ? AND state = 'retry'
+    """
+    update_sql = """
+    UPDATE sync_job_models SET state = ?, attempts = ?, retry_after = ?, description_result = ?, preview_result = COALESCE(?, preview_result) WHERE job_id = ? AND model_type = ? AND model_name = ?
+    """
+    finish_sql = """
+    UPDATE sync_jobs SET status = 'finished' WHERE id = ? AND status = 'running'
+    """
+    dl_markdown = options["dl_markdown"] and shared.opts.model_note_markdown
+    lookup = CivitaiLookup()
+    workers = max(int(shared.opts.model_note_civitai_workers), 1)
+    rate = float(shared.opts.model_note_civitai_requests_per_second)
+    civitai_rate_limiter.rate = rate if rate > 0 else 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model_notes_civitai") as executor:
+        while not sync_worker_stop.is_set() and execute_sql(status_sql, job_id)[0][0] == "running":
+            rows = execute_sql(pending_sql, job_id, time.time(), workers * 4) or []
+            if not rows:
+                next_retry = execute_sql(next_retry_sql, job_id)[0][0]
+                if next_retry is None:
+                    execute_sql(finish_sql, job_id)
+                    return
+                sync_event.wait(timeout=max(next_retry - time.time(), 0))
+                sync_event.clear()
+                continue
+            futures = {executor.submit(run_and_close_connection, sync_model_with_civitai, ModelType(model_type), model_name, options["overwrite"], dl_markdown, preview_path, lookup): (model_type, model_name, attempts) for model_type, model_name, preview_path, attempts in rows}
+            for future in as_completed(futures):
+                model_type, model_name, attempts = futures[future]
+                try:
+                    description_result, preview_result = future.result()
+                except Exception as e:
+                    print(f"Failed to download {model_name} from Civitai: {e}")
+                    description_result, preview_result = ResultType.error, None
+                attempts += 1
+                if description_result != ResultType.error:
+                    state, retry_after = "done", None
+                elif attempts < sync_max_attempts:
+                    state, retry_after = "retry", time.time() + sync_retry_delay * attempts
                 else:
-                    stats["LoRA"]["img_skipped"] += 1
-            
-            description = download_description_from_civit(ModelType.LoRA, lora_item, dl_markdown)
-            if not overwrite:
-                note = get_note(model_hash=get_model_sha256(ModelType.LoRA, lora_item))
-                if note != "":
-                    stats["LoRA"]["skipped"] += 1
-                    continue
-            if description != "":
-                set_note(model_hash=get_model_sha256(ModelType.LoRA, lora_item), note=description, model_type=ModelType.LoRA)
-                stats["LoRA"]["success"] += 1
-            else:
-                stats["LoRA"]["failed"] += 1
+                    state, retry_after = "failed", None
+                execute_sql(update_sql, state, attempts, retry_after, description_result.name, preview_result.name if preview_result is not None else None, job_id, model_type, model_name)
 
-    output_str = ""
-    for key, value in stats.items():
-        output_str += f"{key}: Descriptions: {value['success']} succeeded, {value['failed']} failed, and {value['skipped']} skipped. \nPreviews: {value['img_success']} succeeded, {value['img_failed']} failed, and {value['img_skipped']} skipped. | "
-    return output_str
+def run_sync_worker() -> None:
+    """
+    Runs the jobs one after another in the order they were created until the worker is stopped.
+
+    :return: None.
+    """
+    sql = """
+    SELECT id, options FROM sync_jobs WHERE status = 'running' ORDER BY id LIMIT 1
+    """
+    failed_sql = """
+    UPDATE sync_jobs SET status = 'failed' WHERE id = ?
+    """
+    try:
+        while not sync_worker_stop.is_set():
+            sync_event.clear()
+            rows = execute_sql(sql) or []
+            if not rows:
+                sync_event.wait()
+                continue
+            job_id, options = rows[0]
+            try:
+                run_sync_job(job_id, json.loads(options))
+            except Exception as e:
+                print(f"Civitai download job {job_id} failed: {e}")
+                execute_sql(failed_sql, job_id)
+    finally:
+        close_connection()
+
+def start_sync_worker() -> None:
+    """
+    Starts the background thread running the jobs if it is not running yet, which also resumes unfinished jobs.
+
+    :return: None.
+    """
+    global sync_worker_thread
+    if sync_worker_thread is None or not sync_worker_thread.is_alive():
+        sync_worker_thread = threading.Thread(target=run_sync_worker, name="model_notes_sync_worker", daemon=True)
+        sync_worker_thread.start()
+    sync_event.set()
+
+def on_get_all_civitai(model_types, overwrite : bool, dl_markdown : bool, dl_preview_image : bool, dl_preview_image_overwrite : bool):
+    """
+    Starts a job that gets the model descriptions for all selected models from civitai in the background.
+
+    :param model_types: The selected model types.
+    :param overwrite: Whether to overwrite existing notes.
+    :param dl_markdown: Whether to convert the description in into the markdown format
+    :param dl_preview_image: Whether to download the preview image
+    :param dl_preview_image_overwrite: Whether to overwrite existing preview images
+    :return: A string containing information about the started job
+    """
+    if model_types == []:
+        return "No models selected, nothing to download."
+    job_id = create_sync_job(model_types, overwrite, dl_markdown, dl_preview_image, dl_preview_image_overwrite)
+    return f"Started downloading in the background (job {job_id}). The progress is shown below and the download continues even if this page is closed."
+
+def on_cancel_civitai() -> str:
+    """
+    Cancels all running Civitai download jobs.
+
+    :return: A string containing information about the cancelled jobs
+    """
+    cancelled = [job["id"] for job in get_sync_jobs() if job["status"] == "running" and cancel_sync_job(job["id"])]
+    if cancelled == []:
+        return "No download is running."
+    return f"Cancelled job {', '.join(str(job_id) for job_id in cancelled)}."
 
 def get_textual_inversion_embeddings() -> List[str]:
     """
@@ -632,6 +2559,107 @@ def get_loras() -> List[str]:
         loras.append(name)
     return loras
 
+def get_checkpoint_info(name : str) -> Optional[CheckpointInfo]:
+    """
+    Returns the info of the given checkpoint.
+    The alias table of the webui does not contain the name shown in the extra networks tab for checkpoints in subfolders, so these are looked up in the list of all checkpoints.
+
+    :param name: The title, name or name shown in the extra networks tab of the checkpoint.
+    :return: The info of the checkpoint or None if the checkpoint does not exist.
+    """
+    checkpoint_info : Optional[CheckpointInfo] = checkpoint_alisases.get(name)
+    if checkpoint_info is None:
+        checkpoint_info = next((info for info in sd_models.checkpoints_list.values() if info.name_for_extra == name), None)
+    return checkpoint_info
+
+def get_canonical_model_name(model_type : ModelType, model_name : str) -> str:
+    """
+    Returns the name the model is listed with, which is the name saved with its note.
+    Checkpoints can also be selected by their title or path, which are turned into the name shown in the extra networks tab.
+
+    :param model_type: The type of the model.
+    :param model_name: Any name of the model.
+    :return: The listed name of the model or the given name if the model is unknown.
+    """
+    if model_type == ModelType.Checkpoint:
+        checkpoint_info = get_checkpoint_info(model_name)
+        if checkpoint_info is not None:
+            return checkpoint_info.name_for_extra
+    return model_name
+
+def get_checkpoint_file(name : str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns the file path of the given checkpoint and the title used in the hash cache of the webui.
+
+    :param name: The name of the checkpoint.
+    :return: A tuple containing the path and the title or (None, None) if the checkpoint does not exist.
+    """
+    checkpoint_info = get_checkpoint_info(name)
+    return (checkpoint_info.filename, f'checkpoint/{checkpoint_info.name}') if checkpoint_info is not None else (None, None)
+
+def get_hypernetwork_file(name : str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns the file path of the given hypernetwork and the title used in the hash cache of the webui.
+
+    :param name: The name of the hypernetwork.
+    :return: A tuple containing the path and the title or (None, None) if the hypernetwork does not exist.
+    """
+    hypernetwork_path = shared.hypernetworks.get(name)
+    return (hypernetwork_path, f'hypernet/{name}') if hypernetwork_path is not None else (None, None)
+
+def get_lora_file(name : str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns the file path of the given LoRA and the title used in the hash cache of the webui.
+
+    :param name: The name of the LoRA.
+    :return: A tuple containing the path and the title or (None, None) if the LoRA does not exist.
+    """
+    lora_on_disk = lora.available_loras.get(name)
+    return (lora_on_disk.filename, f'lora/{lora_on_disk.name}') if lora_on_disk is not None else (None, None)
+
+def get_textual_inversion_file(name : str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns the file path of the given textual inversion embedding and the title used in the hash cache of the webui.
+
+    :param name: The name of the textual inversion embedding.
+    :return: A tuple containing the path and the title or (None, None) if the textual inversion embedding does not exist.
+    """
+    embedding = model_hijack.embedding_db.word_embeddings.get(name)
+    return (embedding.filename, f'textual_inversion/{embedding.name}') if embedding is not None else (None, None)
+
+register_model_type(ModelTypeInfo(ModelType.Textual_Inversion, "Textual Inversion", "Textual Inversion", get_textual_inversion_embeddings, get_textual_inversion_file, lambda: model_hijack.embedding_db.load_textual_inversion_embeddings(force_reload=True), ExtraNetworksPageTextualInversion, ".preview", aliases=["embedding", "ti"]))
+register_model_type(ModelTypeInfo(ModelType.Hypernetwork, "Hypernetworks", "Hypernetwork", get_hypernetworks, get_hypernetwork_file, shared.reload_hypernetworks, ExtraNetworksPageHypernetworks, ".preview", aliases=["hn"]))
+register_model_type(ModelTypeInfo(ModelType.Checkpoint, "Checkpoints", "Checkpoint", lambda: [checkpoint.name_for_extra for checkpoint in sd_models.checkpoints_list.values()], get_checkpoint_file, list_models, ExtraNetworksPageCheckpoints, "", list_choices=checkpoint_tiles, aliases=["ckpt", "model"]))
+register_model_type(ModelTypeInfo(ModelType.LoRA, "LoRA", "LoRA", get_loras, get_lora_file, lora.list_available_loras, ExtraNetworksPageLora, ""))
+
+def on_search_notes(query : str, model_type_label : str) -> str:
+    """
+    Searches all notes and renders the results for the search tab.
+
+    :param query: The words to search for, the recently edited notes are shown without any words.
+    :param model_type_label: The label of the model type to search or "All".
+    :return: The results as HTML.
+    """
+    model_type = get_model_type_by_label(model_type_label)
+    if query.strip() == "":
+        recent_notes = get_recent_notes(20, model_type)
+        if not recent_notes:
+            return ""
+        rows = []
+        for model_hash, note_type, model_name, updated_at in recent_notes:
+            name = html.escape(model_name or model_hash[:10])
+            edited = time.strftime("%Y-%m-%d %H:%M", time.localtime(updated_at))
+            rows.append(f"<li><b>{name}</b> <i>({html.escape(model_type_infos[note_type].label)})</i> edited {edited}</li>")
+        return f"<p>Recently edited notes</p><ol class='model_notes_recent_notes'>{''.join(rows)}</ol>"
+    results = find_notes(query, 50, model_type)
+    if not results:
+        return "<p>No notes found.</p>"
+    rows = []
+    for result in results:
+        names = ", ".join(html.escape(name) for name in result["names"]) or html.escape(result["hash"][:10])
+        rows.append(f"<li><b>{names}</b> <i>({html.escape(model_type_infos[ModelType[result['type']]].label)})</i><br>{result['snippet']}</li>")
+    return f"<ol class='model_notes_search_results'>{''.join(rows)}</ol>"
+
 def toggle_editing_markdown(visible: bool):
     """
     Toggles the markdown editor.
@@ -646,7 +2674,26 @@ def toggle_editing_markdown(visible: bool):
         btn_text = "Edit Markdown ✏️" if visible else "Save " + save_style_symbol 
     return visibility, gr.update(visible=visibility), gr.update(value=btn_text)
 
-def export_note_to_disk(title: str, content: str, file_type: FileTypes, folder: Path, overwrite: bool) -> ResultType:
+def write_file_atomic(filepath: Path, content: str, newline: Optional[str] = None) -> None:
+    """
+    Writes a text file through a temporary file in the same folder, so the file is never left half written.
+
+    :param filepath: The path of the file.
+    :param content: The content of the file.
+    :param newline: How line endings are written, see `open`.
+    :return: None.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=".model_notes_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline=newline) as file:
+            file.write(content)
+        os.chmod(tmp_path, default_file_mode)
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def export_note_to_disk(title: str, content: str, file_type: FileTypes, folder: Path, overwrite: bool, converted: bool = False) -> ResultType:
     """
     Exports the given content to a file on disk.
 
@@ -655,18 +2702,18 @@ def export_note_to_disk(title: str, content: str, file_type: FileTypes, folder:
     :param file_type: The type of the file and content.
     :param folder: The directory where the file will be saved.
     :param overwrite: If True, the function will overwrite an existing file with the same name. If False, the function will return an error if the file already exists.
+    :param converted: Whether the content is already converted to the file type.
     :return: A `ResultType` indicating the outcome of the operation. This can be `ResultType.success` if the operation was successful, `ResultType.not_found` if the content is empty, or `ResultType.error` if an error occurred during the operation (such as if the file already exists and `overwrite` is False).
     """
     if content == "":
         return ResultType.not_found
-    if file_type == FileTypes.HTML:
+    if file_type == FileTypes.HTML and not converted:
         content = convert_markdown_to_html(content)
     filepath = folder / f"{title}.{file_type.value[0]}"
     if not overwrite and filepath.exists():
         return ResultType.error
     try:
-        with open(filepath, "w") as file:
-            file.write(content)
+        write_file_atomic(filepath, content)
     except Exception as e:
         print(f"Failed to save note: {e}")
         return ResultType.error
@@ -675,6 +2722,8 @@ def export_note_to_disk(title: str, content: str, file_type: FileTypes, folder:
 def export_all_notes(file_type_picker, export_folder_checkbox, export_directory, export_name, export_folder_overwrite, pr=gr.Progress()):
     """
     Exports all notes to files on disk.
+    Files that still hold the current note since the last import or export are skipped, so only notes that were edited and files that were changed on disk are written.
+    The remaining notes are read with a single query, every distinct note is converted only once and the files are written by a pool of threads.
 
     :param file_type_picker: The chosen file type to export as.
     :param export_folder_checkbox: If True, notes will be saved in the same folder as their respective models. If False, all notes will be saved to a single directory specified by `export_directory`.
@@ -682,156 +2731,237 @@ def export_all_notes(file_type_picker, export_folder_checkbox, export_directory,
     :param export_name: The naming scheme for the exported files. If "Sha256", the files will be named after the sha256 hash of the model. Otherwise, they will be named after the model name.
     :param export_folder_overwrite: If True, the function will overwrite existing files with the same name. If False, the function will skip files that already exist.
     :param pr: A `gr.Progress` instance to monitor the progress of the operation.
-    :return: A string summarizing the result of the operation, including the number of successful saves, missing notes, and failed saves.
+    :return: A string summarizing the result of the operation, including the number of successful saves, unchanged files, missing notes, and failed saves.
     """
     if file_type_picker == "" or (not export_folder_checkbox and export_directory == "") or export_name == "":
         return "Please fill out all fields."
-    stats = {ResultType.success: 0, ResultType.not_found: 0, ResultType.error: 0}
+    stats = {ResultType.success: 0, ResultType.unchanged: 0, ResultType.not_found: 0, ResultType.error: 0}
     def collect_stats(result : ResultType):
         stats[result] += 1
     file_type = FileTypes.from_description(file_type_picker)
-    csv_data = []
-    for embedding in pr.tqdm(model_hijack.embedding_db.word_embeddings.values(), desc="Saving Textual Inversion Notes", total=len(model_hijack.embedding_db.word_embeddings.values()), unit="embeddings"):
-        sha256 = get_model_sha256(ModelType.Textual_Inversion, embedding.name)
-        note = get_note(sha256)
-        if not file_type == FileTypes.CSV:
-            collect_stats(export_note_to_disk(title=sha256 if export_name == "Sha256" else embedding.name, content=convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, file_type=file_type, folder=Path(embedding.filename).parent if export_folder_checkbox else Path(export_directory), overwrite=export_folder_overwrite))
-        elif note != "":
-            csv_data.append({"title" : sha256 if export_name == "Sha256" else embedding.name, "content" : convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, "file_path" : embedding.filename})
-            collect_stats(ResultType.success)
-        else:
-            collect_stats(ResultType.not_found)
-    for name, path in pr.tqdm(shared.hypernetworks.items(), desc="Saving Hypernetwork Notes", total=len(shared.hypernetworks.items()), unit="hypernetworks"):
-        sha256 = get_model_sha256(ModelType.Hypernetwork, name)
-        note = get_note(sha256)
-        if not file_type == FileTypes.CSV:
-            collect_stats(export_note_to_disk(title=sha256 if export_name == "Sha256" else name, content=convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, file_type=file_type, folder=Path(path).parent if export_folder_checkbox else Path(export_directory), overwrite=export_folder_overwrite))
-        elif note != "":
-            csv_data.append({"title" : sha256 if export_name == "Sha256" else name, "content" : convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, "file_path" : path})
-            collect_stats(ResultType.success)
-        else:
-            collect_stats(ResultType.not_found)
-    for name, checkpoint  in pr.tqdm(sd_models.checkpoints_list.items(), desc="Saving Checkpoint Notes", total=len(sd_models.checkpoints_list.items()), unit="checkpoints"):
-        sha256 = get_model_sha256(ModelType.Checkpoint, checkpoint.name_for_extra)
-        note = get_note(sha256)
-        if not file_type == FileTypes.CSV:
-            collect_stats(export_note_to_disk(title=sha256 if export_name == "Sha256" else checkpoint.name_for_extra, content=convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, file_type=file_type, folder=Path(checkpoint.filename).parent if export_folder_checkbox else Path(export_directory), overwrite=export_folder_overwrite))
-        elif note != "":
-            csv_data.append({"title" : sha256 if export_name == "Sha256" else checkpoint.name_for_extra, "content" : convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, "file_path" : checkpoint.filename})
-            collect_stats(ResultType.success)
-        else:
-            collect_stats(ResultType.not_found)
-    for name, lora_on_disk in pr.tqdm(lora.available_loras.items(), desc="Saving LoRA Notes", total=len(lora.available_loras.items()), unit="LoRAs"):
-        sha256 = get_model_sha256(ModelType.LoRA, name)
-        note = get_note(sha256)
-        if not file_type == FileTypes.CSV:
-            collect_stats(export_note_to_disk(title=sha256 if export_name == "Sha256" else name, content=convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, file_type=file_type, folder=Path(lora_on_disk.filename).parent if export_folder_checkbox else Path(export_directory), overwrite=export_folder_overwrite))
-        elif note != "":
-            csv_data.append({"title" : sha256 if export_name == "Sha256" else name, "content" : convert_markdown_to_html(note) if file_type == FileTypes.HTML else note, "file_path" : lora_on_disk.filename})
-            collect_stats(ResultType.success)
-        else:
-            collect_stats(ResultType.not_found)
+    flush_scheduled_notes() # Export the latest autosaved notes
+    note_hashes = get_note_hashes()
+    note_files = get_note_files()
+    converted_notes : Dict[str, str] = {}
+    def convert_note(note : str) -> str:
+        if file_type != FileTypes.HTML or note == "":
+            return note
+        if note not in converted_notes:
+            converted_notes[note] = convert_markdown_to_html(note)
+        return converted_notes[note]
+
+    models = iter_models()
+    total = count_models()
     if file_type == FileTypes.CSV:
         file_path = Path(export_directory) / 'notes.csv'
+        # The spreadsheet holds all notes, so it is only unchanged if every row would be the same.
+        # The rows are hashed as they are listed, the same as the content hash of the JSON list of all rows, and the models are listed again to write them.
+        rows_hasher = hashlib.sha256(b"[")
+        row_count, model_count = 0, 0
+        for model in models:
+            model_count += 1
+            if model.sha256 in note_hashes:
+                row = [model.sha256 if export_name == "Sha256" else model.name, note_hashes[model.sha256], model.path]
+                rows_hasher.update(((", " if row_count > 0 else "") + json.dumps(row)).encode("utf-8"))
+                row_count += 1
+        rows_hasher.update(b"]")
+        rows_hash = rows_hasher.hexdigest()
+        if is_note_file_unchanged(file_path, rows_hash, note_files):
+            return f"Notes spreadsheet at {file_path.absolute()} is already up to date || Saved Notes: 0 | Unchanged: {row_count} | No Note: {model_count - row_count} | Failed to Save Note: 0"
         if file_path.exists() and not export_folder_overwrite:
-            save_location = f"Notes spreadsheet already exists at {file_path.absolute()} and overwrite is disabled"
-        else:
-            with open(file_path, 'w', newline='') as csvfile:
-                # Create a new csv writer object
+            return f"Notes spreadsheet already exists at {file_path.absolute()} and overwrite is disabled || Saved Notes: 0 | Unchanged: 0 | No Note: 0 | Failed to Save Note: 0"
+        notes = get_all_notes()
+        fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=".model_notes_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', newline='') as csvfile:
+                # Create a new csv writer object and write each row as soon as its note is ready
                 writer = csv.writer(csvfile)
-                if csv_data != []:
-                    # Write the headers as the first row
-                    headers = csv_data[0].keys()
-                    writer.writerow(headers)
-                # Write each row of data
-                for row in csv_data:
-                    writer.writerow(row.values())
-            save_location = f"All notes were saved to {file_path.absolute()}"
+                headers_written = False
+                for model in pr.tqdm(iter_models(), desc="Saving Notes", total=total, unit="models"):
+                    note = notes.get(model.sha256, "")
+                    if note == "":
+                        collect_stats(ResultType.not_found)
+                        continue
+                    if not headers_written:
+                        writer.writerow(["title", "content", "file_path"])
+                        headers_written = True
+                    writer.writerow([model.sha256 if export_name == "Sha256" else model.name, convert_note(note), model.path])
+                    collect_stats(ResultType.success)
+            os.chmod(tmp_path, default_file_mode)
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        set_note_files([(str(file_path), "", rows_hash)])
+        save_location = f"All notes were saved to {file_path.absolute()}"
     else:
+        changed_models : List[Tuple[ModelRecord, Path]] = []
+        for model in pr.tqdm(models, desc="Finding Changes", total=total, unit="models"):
+            if model.sha256 not in note_hashes:
+                collect_stats(ResultType.not_found)
+                continue
+            folder = Path(model.path).parent if export_folder_checkbox else Path(export_directory)
+            title = model.sha256 if export_name == "Sha256" else model.name
+            filepath = folder / f"{title}.{file_type.extension}"
+            if is_note_file_unchanged(filepath, note_hashes[model.sha256], note_files):
+                collect_stats(ResultType.unchanged)
+            else:
+                changed_models.append((model, filepath))
+        notes = get_notes([model.sha256 for model, _ in changed_models])
+        exported_files : List[Tuple[str, str, str]] = []
+        with ThreadPoolExecutor(max_workers=8, thread_name_prefix="model_notes_export") as executor:
+            futures = {executor.submit(export_note_to_disk, title=filepath.stem, content=convert_note(notes.get(model.sha256, "")), file_type=file_type, folder=filepath.parent, overwrite=export_folder_overwrite, converted=True): (model, filepath) for model, filepath in changed_models}
+            for future in pr.tqdm(as_completed(futures), desc="Saving Notes", total=len(futures), unit="models"):
+                result = future.result()
+                if result == ResultType.success:
+                    model, filepath = futures[future]
+                    exported_files.append((str(filepath), model.sha256, note_hashes[model.sha256]))
+                collect_stats(result)
+        set_note_files(exported_files)
         save_location = f"All notes where saved in the same folder as the model" if export_folder_checkbox else f"All models where saved to {Path(export_directory).absolute()}"
-    return f"{save_location} || Saved Notes: {stats[ResultType.success]} | No Note: {stats[ResultType.not_found]} | Failed to Save Note: {stats[ResultType.error]}"
+    return f"{save_location} || Saved Notes: {stats[ResultType.success]} | Unchanged: {stats[ResultType.unchanged]} | No Note: {stats[ResultType.not_found]} | Failed to Save Note: {stats[ResultType.error]}"
 
-def import_note_from_disk(title: str, file_types: List[FileTypes], folder: Path) -> Union[ResultType, str]:
+def read_note_file(filepath: str, file_type: FileTypes) -> Tuple[ResultType, str]:
     """
-    Imports a note from a file on disk.
+    Reads a note from a file on disk.
 
-    :param title: The filename without extension from which the note will be imported.
-    :param file_types: A list of possible file types that will be tried in order until a file with a matching type is found.
-    :param folder: The directory where the file is expected to be found.
-    :return: A tuple where the first element is a `ResultType` indicating the outcome of the operation. This can be `ResultType.success` if the operation was successful, `ResultType.not_found` if no file was found with any of the given file types, or `ResultType.error` if an error occurred during the operation (such as a file read error). The second element is the content of the note if the operation was successful, or an error message if an error occurred, or an empty string if no file was found.
+    :param filepath: The path of the file.
+    :param file_type: The type of the file.
+    :return: A tuple where the first element is a `ResultType` indicating the outcome of the operation. This can be `ResultType.success` if the operation was successful or `ResultType.error` if an error occurred during the operation (such as a file read error). The second element is the content of the note if the operation was successful or an error message if an error occurred.
     """
-    for file_type in file_types:
-        filepath = folder / f"{title}.{file_type.value[0]}"
-        if filepath.exists() and filepath.is_file():
-            try:
-                with open(filepath, 'r') as file:
-                    content = file.read()
-                    if file_type == FileTypes.HTML:
-                        content = html2markdown.convert(content)
-                return ResultType.success, content
-            except Exception as e:
-                return ResultType.error, str(e)
-    return ResultType.not_found, ""
+    try:
+        with open(filepath, 'r') as file:
+            content = file.read()
+            if file_type == FileTypes.HTML:
+                content = html2markdown.convert(content)
+        return ResultType.success, content
+    except Exception as e:
+        return ResultType.error, str(e)
+
+def scan_note_files(folder: Path, file_types: List[FileTypes]) -> Dict[str, Dict[FileTypes, str]]:
+    """
+    Lists all note files in a folder with a single directory scan.
+
+    :param folder: The folder to scan.
+    :param file_types: The file types of the notes.
+    :return: A dictionary mapping the filenames without extension to the paths of the note files per file type.
+    """
+    extensions = {f".{file_type.extension}": file_type for file_type in file_types}
+    note_files : Dict[str, Dict[FileTypes, str]] = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                title, ext = os.path.splitext(entry.name)
+                file_type = extensions.get(ext)
+                if file_type is not None and entry.is_file():
+                    note_files.setdefault(title, {})[file_type] = entry.path
+    except OSError:
+        pass # A missing folder just has no notes
+    return note_files
+
+def read_notes_csv(filepath: Path) -> Tuple[Dict[str, str], Optional[str]]:
+    """
+    Reads the notes from a spreadsheet written by the csv export.
+
+    :param filepath: The path of the spreadsheet.
+    :return: A tuple containing a dictionary mapping the titles to the notes and an error message if the spreadsheet could not be read.
+    """
+    csv.field_size_limit(2**31 - 1) # Notes can be longer than the default limit
+    try:
+        with open(filepath, 'r', newline='') as csvfile:
+            return {row["title"]: row["content"] for row in csv.DictReader(csvfile) if row.get("title")}, None
+    except Exception as e:
+        return {}, str(e)
 
 def import_all_notes(model_types, overwrite, import_name, import_folder_checkbox, import_directory, pr=gr.Progress()):
     """
     Imports all notes from files on disk to the corresponding models.
+    Every folder is scanned once and files that were not changed since the last import or export of the current note are skipped.
+    The remaining note files are read by a pool of threads and all changed notes are saved in a single transaction.
 
-    :param model_types: A list of file types that the notes are stored in. The function will try to import the note from the file types in the given order until a file with a matching type is found.
+    :param model_types: A list of file types that the notes are stored in. If a model has notes in several file types then the file type with the highest id is imported.
     :param overwrite: If True, existing notes will be overwritten. If False, existing notes will be kept and new notes will be skipped.
-    :param import_name: Determines whether the title of the file to import from is the SHA256 hash of the model or the name of the model. Must be either "Sha256" or "Name".
-    :param import_folder_checkbox: If True, the function will look for the files in the same directory as the corresponding model. If False, the function will look for the files in the directory specified by `import_directory`.
+    :param import_name: Determines whether the title of the file to import from is the SHA256 hash of the model or the name of the model. Must be either "Sha256" or "Model Name".
+    :param import_folder_checkbox: If True, the function will look for the files in the same directory as the corresponding model. If False, the function will look for the files in the directory specified by `import_directory`. Spreadsheets are always read from `import_directory`.
     :param import_directory: The directory where the function will look for the files if `import_folder_checkbox` is False.
     :param pr: A progress bar object to display the progress of the operation.
-    :return: A string summarizing the result of the operation, including the number of notes successfully imported, the number of notes not found, the number of existing notes skipped, and the number of notes that failed to import.
+    :return: A string summarizing the result of the operation, including the number of notes successfully imported, the number of unchanged notes, the number of notes not found, the number of existing notes skipped, and the number of notes that failed to import.
     """
     if model_types == []:
         return "No note types selected, nothing to import."
-    if not import_folder_checkbox and import_directory == "":
+    if (not import_folder_checkbox or str(FileTypes.CSV) in model_types) and import_directory == "":
         return "Please select a folder to import from."
-    stats = {ResultType.success: 0, ResultType.not_found: 0, ResultType.skipped : 0, ResultType.error: 0}
+    stats = {ResultType.success: 0, ResultType.unchanged: 0, ResultType.not_found: 0, ResultType.skipped : 0, ResultType.error: 0}
     file_types = sorted([FileTypes.from_description(file_type) for file_type in model_types], key=lambda x: x.value[2], reverse=True)
     
     def collect_stats(result : ResultType):
         stats[result] += 1
 
-    for embedding in pr.tqdm(model_hijack.embedding_db.word_embeddings.values(), desc="Importing Textual Inversion Notes", total=len(model_hijack.embedding_db.word_embeddings.values()), unit="embeddings"):
-        sha256 = get_model_sha256(ModelType.Textual_Inversion, embedding.name)
-        if not overwrite and get_note(sha256) != "":
-            collect_stats(ResultType.skipped)
-            continue
-        result, note = import_note_from_disk(title=sha256 if import_name == "Sha256" else embedding.name, file_types=file_types, folder=Path(embedding.filename).parent if import_folder_checkbox else Path(import_directory))
-        if note != "":
-            set_note(model_hash=sha256, note=note, model_type=ModelType.Textual_Inversion)
-        collect_stats(result)
-    for name, path in pr.tqdm(shared.hypernetworks.items(), desc="Importing Hypernetwork Notes", total=len(shared.hypernetworks.items()), unit="hypernetworks"):
-        sha256 = get_model_sha256(ModelType.Hypernetwork, name)
-        if not overwrite and get_note(sha256) != "":
-            collect_stats(ResultType.skipped)
-            continue
-        result, note = import_note_from_disk(title=sha256 if import_name == "Sha256" else name, file_types=file_types, folder=Path(path).parent if import_folder_checkbox else Path(import_directory))
-        if note != "":
-            set_note(model_hash=sha256, note=note, model_type=ModelType.Hypernetwork)
-        collect_stats(result)
-    for name, checkpoint in pr.tqdm(sd_models.checkpoints_list.items(), desc="Importing Checkpoint Notes", total=len(sd_models.checkpoints_list.items()), unit="checkpoints"):
-        sha256 = get_model_sha256(ModelType.Checkpoint, checkpoint.name_for_extra)
-        if not overwrite and get_note(sha256) != "":
-            collect_stats(ResultType.skipped)
-            continue
-        result, note = import_note_from_disk(title=sha256 if import_name == "Sha256" else checkpoint.name_for_extra, file_types=file_types, folder=Path(checkpoint.filename).parent if import_folder_checkbox else Path(import_directory))
-        if note != "":
-            set_note(model_hash=sha256, note=note, model_type=ModelType.Checkpoint)
-        collect_stats(result)
-    for name, lora_on_disk in pr.tqdm(lora.available_loras.items(), desc="Importing LoRA Notes", total=len(lora.available_loras.items()), unit="LoRAs"):
-        sha256 = get_model_sha256(ModelType.LoRA, name)
-        if not overwrite and get_note(sha256) != "":
-            collect_stats(ResultType.skipped)
-            continue
-        result, note = import_note_from_disk(title=sha256 if import_name == "Sha256" else name, file_types=file_types, folder=Path(lora_on_disk.filename).parent if import_folder_checkbox else Path(import_directory))
-        if note != "":
-            set_note(model_hash=sha256, note=note, model_type=ModelType.LoRA)
-        collect_stats(result)
-    return f"Imported Notes: {stats[ResultType.success]} | No Note: {stats[ResultType.not_found]} | Skipped existing notes {stats[ResultType.skipped]}| Notes failed to import: {stats[ResultType.error]}"
+    csv_notes : Dict[str, str] = {}
+    if FileTypes.CSV in file_types:
+        csv_notes, error = read_notes_csv(Path(import_directory) / 'notes.csv')
+        if error is not None:
+            return f"Failed to read the notes spreadsheet: {error}"
+    flush_scheduled_notes() # Autosaved notes must not overwrite the imported notes later
+    note_hashes = get_note_hashes()
+    synced_files = get_note_files()
+    folders : Dict[Path, Dict[str, Dict[FileTypes, str]]] = {}
+    imported_notes : List[Tuple[ModelType, str, str]] = []
+    imported_names : Dict[str, str] = {}
+    imported_files : List[Tuple[str, str, str]] = []
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix="model_notes_import") as executor:
+        futures = {}
+        for model in pr.tqdm(iter_models(), desc="Finding Notes", total=count_models(), unit="models"):
+            if model.sha256 is None:
+                collect_stats(ResultType.not_found)
+                continue
+            if not overwrite and model.sha256 in note_hashes:
+                collect_stats(ResultType.skipped)
+                continue
+            title = model.sha256 if import_name == "Sha256" else model.name
+            folder = Path(model.path).parent if import_folder_checkbox else Path(import_directory)
+            if folder not in folders:
+                folders[folder] = scan_note_files(folder, file_types)
+            model_files = folders[folder].get(title, {})
+            file_type = next((file_type for file_type in file_types if file_type in model_files or (file_type == FileTypes.CSV and title in csv_notes)), None)
+            if file_type is None:
+                collect_stats(ResultType.not_found)
+            elif file_type == FileTypes.CSV:
+                note = csv_notes[title]
+                if note == "":
+                    collect_stats(ResultType.not_found)
+                elif note_hashes.get(model.sha256) == get_content_hash(note):
+                    collect_stats(ResultType.unchanged)
+                else:
+                    imported_notes.append((model.model_type, model.sha256, note))
+                    imported_names[model.sha256] = model.name
+                    collect_stats(ResultType.success)
+            elif is_note_file_unchanged(model_files[file_type], note_hashes.get(model.sha256), synced_files):
+                collect_stats(ResultType.unchanged)
+            else:
+                futures[executor.submit(read_note_file, model_files[file_type], file_type)] = (model, model_files[file_type])
+        for future in pr.tqdm(as_completed(futures), desc="Importing Notes", total=len(futures), unit="notes"):
+            model, filepath = futures[future]
+            result, note = future.result()
+            if result == ResultType.success and note == "":
+                result = ResultType.not_found
+            elif result == ResultType.success:
+                note_hash = get_content_hash(note)
+                if note_hashes.get(model.sha256) == note_hash:
+                    result = ResultType.unchanged
+                else:
+                    imported_notes.append((model.model_type, model.sha256, note))
+                    imported_names[model.sha256] = model.name
+                imported_files.append((filepath, model.sha256, note_hash))
+            else:
+                print(f"Failed to import note for {model.name}: {note}")
+            collect_stats(result)
+    if imported_notes and not set_notes(imported_notes, imported_names):
+        stats[ResultType.error] += stats[ResultType.success]
+        stats[ResultType.success] = 0
+    else:
+        set_note_files(imported_files)
+    return f"Imported Notes: {stats[ResultType.success]} | Unchanged: {stats[ResultType.unchanged]} | No Note: {stats[ResultType.not_found]} | Skipped existing notes {stats[ResultType.skipped]}| Notes failed to import: {stats[ResultType.error]}"
 
 def on_ui_tabs() -> Tuple[gr.Blocks, str, str]:
     """
@@ -839,24 +2969,15 @@ def on_ui_tabs() -> Tuple[gr.Blocks, str, str]:
     
     :return: A tuple containing the UI tab for model notes.
     """
-    supported_models = ["Textual Inversion", "Hypernetworks", "Checkpoints", "LoRA"]
+    supported_models = [info.label for info in model_type_infos.values()]
     with gr.Blocks(analytics_enabled=False) as main_tab:
-        for model in supported_models:
-            with gr.Tab(model):
+        for info in model_type_infos.values():
+            with gr.Tab(info.label):
                 with FormRow(elem_id="notes_mode_selection"):
                     with FormRow(variant='panel'):
-                        if model == "Textual Inversion":
-                            notes_model_select = gr.Dropdown(get_textual_inversion_embeddings(), elem_id="notes_embedding_model_dropdown", label="Select Textual Inversion", interactive=True)
-                            create_refresh_button(notes_model_select, lambda: model_hijack.embedding_db.load_textual_inversion_embeddings(force_reload=True), lambda: {"choices": get_textual_inversion_embeddings()}, "refresh_notes_embedding_model_dropdown")
-                        elif model == "Hypernetworks":
-                            notes_model_select = gr.Dropdown(get_hypernetworks(), elem_id="notes__hypernetwork_model_dropdown", label="Select Hypernetwork", interactive=True)
-                            create_refresh_button(notes_model_select, shared.reload_hypernetworks, lambda: {"choices": get_hypernetworks()}, "refresh_notes_hypernetwork_model_dropdown")
-                        elif model == "LoRA":
-                            notes_model_select = gr.Dropdown(get_loras(), elem_id="notes_lora_model_dropdown", label="Select LoRA", interactive=True)
-                            create_refresh_button(notes_model_select, lora.list_available_loras, lambda: {"choices": get_loras()}, "refresh_notes_lora_model_dropdown")
-                        elif model == "Checkpoints":
-                            notes_model_select = gr.Dropdown(checkpoint_tiles(), elem_id="notes_lora_model_dropdown", label="Select Checkpoint", interactive=True)
-                            create_refresh_button(notes_model_select, list_models, lambda: {"choices": checkpoint_tiles()}, "refresh_notes_lora_model_dropdown")
+                        elem_name = info.model_type.name.lower()
+                        notes_model_select = gr.Dropdown(info.list_choices(), elem_id=f"notes_{elem_name}_model_dropdown", label=f"Select {info.select_label}", interactive=True)
+                        create_refresh_button(notes_model_select, info.refresh, lambda info=info: {"choices": info.list_choices()}, f"refresh_notes_{elem_name}_model_dropdown")
                     if shared.opts.model_note_markdown:
                         save_button = gr.Button(value="Edit Markdown ✏️", variant="secondary", elem_id="notes_markdown_toggle_button") # This leads to saving even when swapping to editing mode but that should be fine
                     elif not shared.opts.model_note_autosave:
@@ -871,34 +2992,20 @@ def on_ui_tabs() -> Tuple[gr.Blocks, str, str]:
                         save_button.click(fn=toggle_editing_markdown, inputs=[state_visible_toggle_button], outputs=[state_visible_toggle_button, note_box, save_button])
                 else:
                     note_box = gr.Textbox(label="Note", lines=25, elem_id="model_notes_textbox", placeholder="Make a note about the model selected above!", interactive=False)
-                if model == "Textual Inversion":
-                    notes_model_select.change(fn=lambda select: on_model_selection(ModelType.Textual_Inversion, select), inputs=[notes_model_select], outputs=[note_box])
-                    if shared.opts.model_note_autosave:
-                        note_box.change(fn=lambda select, note: on_save_note(ModelType.Textual_Inversion, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    else:
-                        save_button.click(fn=lambda select, note: on_save_note(ModelType.Textual_Inversion, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    civitai_button.click(fn=lambda select, note: on_civitai(ModelType.Textual_Inversion, select, note), inputs=[notes_model_select, note_box], outputs=[note_box])
-                elif model == "Hypernetworks":
-                    notes_model_select.change(fn=lambda select: on_model_selection(ModelType.Hypernetwork, select), inputs=[notes_model_select], outputs=[note_box])
-                    if shared.opts.model_note_autosave:
-                        note_box.change(fn=lambda select, note: on_save_note(ModelType.Hypernetwork, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    else:
-                        save_button.click(fn=lambda select, note: on_save_note(ModelType.Hypernetwork, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    civitai_button.click(fn=lambda select, note: on_civitai(ModelType.Hypernetwork, select, note), inputs=[notes_model_select, note_box], outputs=[note_box])
-                elif model == "LoRA":
-                    notes_model_select.change(fn=lambda select: on_model_selection(ModelType.LoRA, select), inputs=[notes_model_select], outputs=[note_box])
-                    if shared.opts.model_note_autosave:
-                        note_box.change(fn=lambda select, note: on_save_note(ModelType.LoRA, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    else:
-                        save_button.click(fn=lambda select, note: on_save_note(ModelType.LoRA, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    civitai_button.click(fn=lambda select, note: on_civitai(ModelType.LoRA, select, note), inputs=[notes_model_select, note_box], outputs=[note_box])
-                elif model == "Checkpoints":
-                    notes_model_select.change(fn=lambda select: on_model_selection(ModelType.Checkpoint, select), inputs=[notes_model_select], outputs=[note_box])
-                    if shared.opts.model_note_autosave:
-                        note_box.change(fn=lambda select, note: on_save_note(ModelType.Checkpoint, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    else:
-                        save_button.click(fn=lambda select, note: on_save_note(ModelType.Checkpoint, select, note), inputs=[notes_model_select, note_box], outputs=[])
-                    civitai_button.click(fn=lambda select, note: on_civitai(ModelType.Checkpoint, select, note), inputs=[notes_model_select, note_box], outputs=[note_box])
+                notes_model_select.change(fn=lambda select, model_type=info.model_type: on_model_selection(model_type, select), inputs=[notes_model_select], outputs=[note_box])
+                if shared.opts.model_note_autosave:
+                    note_box.change(fn=lambda select, note, model_type=info.model_type: on_save_note(model_type, select, note, autosave=True), inputs=[notes_model_select, note_box], outputs=[])
+                else:
+                    save_button.click(fn=lambda select, note, model_type=info.model_type: on_save_note(model_type, select, note), inputs=[notes_model_select, note_box], outputs=[])
+                civitai_button.click(fn=lambda select, note, model_type=info.model_type: on_civitai(model_type, select, note), inputs=[notes_model_select, note_box], outputs=[note_box])
+
+        with gr.Tab("Search"):
+            with FormRow(variant='panel'):
+                search_query = gr.Textbox(label="Search Notes", placeholder="Words the note should contain, for example a trigger word", elem_id="model_notes_search_query", interactive=True)
+                search_model_type = gr.Dropdown(["All"] + supported_models, value="All", label="Models", elem_id="model_notes_search_model_type", interactive=True)
+            search_results = gr.HTML(value=lambda: on_search_notes("", "All"), elem_id="model_notes_search_results")
+            search_query.change(fn=on_search_notes, inputs=[search_query, search_model_type], outputs=[search_results])
+            search_model_type.change(fn=on_search_notes, inputs=[search_query, search_model_type], outputs=[search_results])
 
         with gr.Tab("Civitai"):
             model_types = gr.CheckboxGroup(supported_models, label="Models", info="Select Model types to get descriptions for")
@@ -910,12 +3017,16 @@ def on_ui_tabs() -> Tuple[gr.Blocks, str, str]:
             with gr.Box():
                 dl_preview_image = gr.Checkbox(value=True, label="Download preview image from Civitai", info="Download the first preview image from civitai that is then shown in the extra network tabs", interactive=True)
                 dl_preview_image_overwrite = gr.Checkbox(value=False, label="Overwrite existing preview images", info="Overwrite existing preview images with images from civitai", interactive=True)
-            get_all_button = gr.Button(value="Get all descriptions from Civitai", variant="primary")
+            with FormRow():
+                get_all_button = gr.Button(value="Get all descriptions from Civitai", variant="primary", elem_id="model_notes_civitai_start")
+                cancel_button = gr.Button(value="Cancel", variant="secondary", elem_id="model_notes_civitai_cancel")
             civit_stats = gr.Label(value="", label="Result")
+            gr.HTML(value="<div id='model_notes_civitai_job_status'></div>") # Filled by polling the job status, see civitai_jobs.js
             get_all_button.click(fn=on_get_all_civitai, inputs=[model_types, overwrite, dl_markdown, dl_preview_image, dl_preview_image_overwrite], outputs=[civit_stats])
+            cancel_button.click(fn=on_cancel_civitai, inputs=[], outputs=[civit_stats])
 
         with gr.Tab("Import"):
-            import_model_types = gr.CheckboxGroup([str(filetype) for filetype in FileTypes if not filetype == FileTypes.CSV], label="Import Formats", info="Select note types to import.\nIf a model as multiple note formats then only the most right selected format will be imported")
+            import_model_types = gr.CheckboxGroup([str(filetype) for filetype in FileTypes], label="Import Formats", info="Select note types to import.\nIf a model as multiple note formats then only the most right selected format will be imported")
             with gr.Box():
                 import_folder_checkbox = gr.Checkbox(label="Import from the models folder", info="Import notes from the folder where models are stored (ignored for csv)", value=True, elem_id="model_notes_import_folder_checkbox", interactive=True)
                 import_directory = gr.Textbox(label="Import Directory Path", info="The folder where notes should be imported from", file_count="directory", elem_id="model_notes_import_folder_picker", visible=False, interactive=True)
@@ -947,43 +3058,73 @@ def on_ui_settings() -> None:
     :return: None
     """
     shared.opts.add_option("model_note_autosave", shared.OptionInfo(default=False, label="Enable autosaving edits in note fields", component=gr.Checkbox, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_autosave_delay", shared.OptionInfo(default=1.0, label="Seconds without edits until an autosaved note is saved", component=gr.Slider, component_args={"minimum": 0.1, "maximum": 10, "step": 0.1}, section=("model-notes", "Model-Notes")))
     shared.opts.add_option("model_note_markdown", shared.OptionInfo(default=False, label="Enable Markdown support", component=gr.Checkbox, section=("model-notes", "Model-Notes")))
     shared.opts.add_option("model_note_hide_extra_note_preview", shared.OptionInfo(default=True, label="Hide extra model note preview", component=gr.Checkbox, section=("model-notes", "Model-Notes")))
     shared.opts.add_option("model_note_hide_extra_note_inject", shared.OptionInfo(default=False, label="Inject note into extra note preview", component=gr.Checkbox, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_civitai_workers", shared.OptionInfo(default=4, label="Number of models downloaded from Civitai at the same time", component=gr.Number, component_args={"precision": 0}, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_civitai_requests_per_second", shared.OptionInfo(default=4, label="Maximum number of requests per second sent to Civitai", component=gr.Number, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_preview_max_size", shared.OptionInfo(default=0, label="Maximum width and height of preview images downloaded from Civitai, 0 keeps the original size", component=gr.Number, component_args={"precision": 0}, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_civitai_cache_hours", shared.OptionInfo(default=24, label="Hours until cached Civitai responses are checked for changes", component=gr.Number, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_civitai_api_url", shared.OptionInfo(default="https://civitai.com/api/v1", label="Civitai API url", component=gr.Textbox, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_compression", shared.OptionInfo(default=False, label="Compress large notes in the database", component=gr.Checkbox, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_compression_threshold", shared.OptionInfo(default=4096, label="Minimum size in bytes of notes that are compressed", component=gr.Number, component_args={"precision": 0}, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_html_cache_size", shared.OptionInfo(default=1024, label="Number of rendered markdown notes kept in memory, 0 disables the cache (requires restart)", component=gr.Number, component_args={"precision": 0}, section=("model-notes", "Model-Notes")))
+    shared.opts.add_option("model_note_cache_size", shared.OptionInfo(default=4096, label="Number of notes kept in memory (requires restart)", component=gr.Number, component_args={"precision": 0}, section=("model-notes", "Model-Notes")))
 
 def on_script_unloaded() -> None:
     """
-    Close the database connection when the script is unloaded.
+    Close the database connections when the script is unloaded.
 
     :return: None
     """
-    if conn:
-        conn.close()
+    sync_worker_stop.set()
+    sync_event.set()
+    hash_executor.shutdown(wait=False)
+    flush_scheduled_notes()
+    with scheduled_notes_lock:
+        if scheduled_notes_timer is not None:
+            scheduled_notes_timer.cancel() # A failed save is not tried again after the executor is shut down
+    scheduled_notes_executor.shutdown(wait=False)
+    close_connections()
 
 def overwrite_load_descriptions():
+    """
+    Replaces the description lookup of the extra network pages with the notes saved in the database.
+    All notes are loaded with a single query and shared by the pages until a note changes, so every card is served from memory instead of querying the database once per card.
+
+    :return: None
+    """
+    page_model_types = {info.extra_page: model_type for model_type, info in model_type_infos.items()}
+    original_create_html = ui_extra_networks.ExtraNetworksPage.create_html
+
+    def new_create_html(self, *args, **kwargs):
+        self.model_notes_prefetched = get_all_notes_snapshot()
+        try:
+            return original_create_html(self, *args, **kwargs)
+        finally:
+            self.model_notes_prefetched = None
 
     def new_load_descriptions(self, path):
-        if isinstance(self, ExtraNetworksPageTextualInversion):
-            sha256 = get_model_sha256(ModelType.Textual_Inversion, os.path.basename(path))
-            return get_note(sha256)
-        elif isinstance(self, ExtraNetworksPageHypernetworks):
-            sha256 = get_model_sha256(ModelType.Hypernetwork, os.path.basename(path))
-            return get_note(sha256)
-        elif isinstance(self, ExtraNetworksPageCheckpoints):
-            sha256 = get_model_sha256(ModelType.Checkpoint, os.path.basename(path))
-            return get_note(sha256)
-        elif isinstance(self, ExtraNetworksPageLora):
-            sha256 = get_model_sha256(ModelType.LoRA, os.path.basename(path))
-            return get_note(sha256)
-        else:
+        model_type = next((model_type for page, model_type in page_model_types.items() if isinstance(self, page)), None)
+        if model_type is None:
             return ""
+        sha256 = get_model_sha256(model_type, os.path.basename(path), blocking=False)
+        if sha256 is None:
+            return ""
+        prefetched_notes : Optional[Dict[str, str]] = getattr(self, "model_notes_prefetched", None)
+        if prefetched_notes is not None:
+            return prefetched_notes.get(sha256, "")
+        return get_note(sha256)
 
+    ui_extra_networks.ExtraNetworksPage.create_html = new_create_html
     ui_extra_networks.ExtraNetworksPage.find_description = new_load_descriptions
 
 script_callbacks.on_ui_tabs(on_ui_tabs)
 script_callbacks.on_ui_settings(on_ui_settings)
 script_callbacks.on_script_unloaded(on_script_unloaded)
 script_callbacks.on_app_started(on_app_started)
+script_callbacks.on_model_loaded(on_model_loaded)
 
 def toggle_visibility(is_visible: bool) -> Tuple[bool, gr.update]:
     """
@@ -1018,23 +3159,18 @@ class NoteButtons(scripts.Script):
         """
         return scripts.AlwaysVisible
 
-    def on_save_note(self, note: str) -> None:
+    def on_save_note(self, note: str, autosave: bool = False) -> None:
         """
         Save a note about the selected model.
         
         :param note: The note that should be saved for the selected model.
+        :param autosave: Whether the note was edited with autosaving enabled, in which case it is saved once the edits stop.
         :return: None
         """
-        set_note(model_hash=shared.opts.sd_checkpoint_hash, note=note, model_type=ModelType.Checkpoint)
-
-    def on_get_note(self) -> gr.update:
-        """
-        Get the note about the selected model and update it to the UI.
-        
-        :return: Gradio update setting the value to the note content and the lable to the models name.
-        """
-        note = get_note(shared.opts.sd_checkpoint_hash)
-        return gr.update(value=note, label=f"Note on {shared.opts.sd_model_checkpoint}", lines=note.count("\n") + 1)
+        if autosave:
+            schedule_note(model_hash=shared.opts.sd_checkpoint_hash, note=note, model_type=ModelType.Checkpoint, model_name=shared.opts.sd_model_checkpoint)
+        else:
+            set_note(model_hash=shared.opts.sd_checkpoint_hash, note=note, model_type=ModelType.Checkpoint, model_name=shared.opts.sd_model_checkpoint)
 
     def after_component(self, component, **kwargs):
         """
@@ -1079,12 +3215,11 @@ class NoteButtons(scripts.Script):
                     gr.Markdown(value="Nothing to see here", visible=False, elem_id="model_notes_markdown_template")
                     save_button.click(fn=toggle_editing_markdown, inputs=[state_visible_toggle_button], outputs=[state_visible_toggle_button, tex, save_button])
                 if shared.opts.model_note_autosave:
-                    tex.change(fn=self.on_save_note, inputs=[tex], outputs=[])
+                    tex.change(fn=lambda note: self.on_save_note(note, autosave=True), inputs=[tex], outputs=[])
                 else:
                     if not shared.opts.model_note_markdown:
                         save_button = gr.Button(value="Save changes " + save_style_symbol, variant="primary", elem_id="save_model_note")
                     else:
                         save_button = gr.Button(value="", variant="primary", elem_id="save_model_note", visible=False)
                     save_button.click(fn=self.on_save_note, inputs=[tex], outputs=[])
-                update_button = ToolButton(value=notes_symbol, elem_id="model_note_update", visible=False)
-                update_button.click(fn=self.on_get_note, inputs=[], outputs=[tex])
\ No newline at end of file
+                # The note is updated by update_note.js when another checkpoint is loaded
\ No newline at end of file